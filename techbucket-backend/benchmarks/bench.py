@@ -0,0 +1,321 @@
+"""
+Microbenchmarks for the query and serialization hot paths.
+
+Seeds a throwaway SQLite database at a configurable scale, then times,
+through the Flask test client where a request is involved:
+
+* ``to_dict()`` for every model
+* every admin list endpoint and the dashboard
+* the four public form submissions
+* ``serve()`` for the SPA shell
+
+Each case reports p50/p95/p99/mean latency from a timed pass and, from a
+separate pass under tracemalloc (which would distort the timings),
+allocated and peak bytes per operation. Results are written as JSON so two
+runs can be diffed:
+
+    python benchmarks/bench.py --scale 2000 --output before.json
+    python benchmarks/bench.py --scale 2000 --output after.json --compare before.json
+
+``--compare`` exits non-zero when any case's p50 regressed by more than
+``--threshold`` percent.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, time as dt_time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy
+from sqlalchemy import insert
+
+from src.main import create_app
+from src.migrations import seed, upgrade
+from src.models.user import db
+from src.models.admin import Admin, Brand, Category, Event, Product, Service
+from src.models.forms import EventRegistration, Inquiry, QuoteRequest, SupportCase
+from src.utils.counters import reconcile_counters
+from src.utils.search import reindex
+
+SERIALIZE_BATCH = 100
+
+# Data
+
+def seed_benchmark_data(scale, rng):
+    """Bulk insert ``scale`` products and submissions of each type (plus
+    brands, categories and events in proportion). The caller commits."""
+    now = datetime.utcnow()
+    def created(index):
+        return now - timedelta(minutes=index)
+
+    brands = [{'name': f'Brand {i}', 'description': f'Bench brand {i}', 'is_active': True,
+               'created_at': now, 'updated_at': now} for i in range(max(3, scale // 100))]
+    categories = [{'name': f'Category {i}', 'description': f'Bench category {i}', 'is_active': True,
+                   'created_at': now, 'updated_at': now} for i in range(max(3, scale // 200))]
+    db.session.execute(insert(Brand), brands)
+    db.session.execute(insert(Category), categories)
+    brand_ids = [row[0] for row in db.session.query(Brand.id)]
+    category_ids = [row[0] for row in db.session.query(Category.id)]
+
+    db.session.execute(insert(Product), [{
+        'name': f'Product {i}',
+        'description': f'Benchmark product {i} ' * 5,
+        'specifications': [f'Spec {n}: {rng.randint(1, 100)}' for n in range(5)],
+        'price': round(rng.uniform(10, 10000), 2),
+        'is_active': rng.random() > 0.1,
+        'featured': rng.random() < 0.1,
+        'brand_id': rng.choice(brand_ids),
+        'category_id': rng.choice(category_ids),
+        'created_at': created(i),
+        'updated_at': created(i)
+    } for i in range(scale)])
+
+    events = [{
+        'title': f'Event {i}', 'description': f'Benchmark event {i}',
+        'date': date.today() + timedelta(days=i), 'time': dt_time(10, 0), 'location': 'Kathmandu',
+        'capacity': 100, 'price': 0, 'event_type': 'Workshop', 'status': 'Open',
+        'agenda': ['Intro', 'Talk', 'Q&A'], 'is_active': True, 'created_at': now, 'updated_at': now
+    } for i in range(max(5, scale // 20))]
+    db.session.execute(insert(Event), events)
+    event_ids = [row[0] for row in db.session.query(Event.id)]
+
+    db.session.execute(insert(QuoteRequest), [{
+        'product_name': f'Product {rng.randrange(scale)}', 'quantity': rng.randint(1, 50),
+        'name': f'Customer {i}', 'contact': '9800000000', 'email': f'customer{i}@example.com',
+        'company': 'Example Ltd', 'requirements': 'Rack mount', 'status': rng.choice(['pending', 'quoted']),
+        'created_at': created(i)
+    } for i in range(scale)])
+    db.session.execute(insert(SupportCase), [{
+        'name': f'Customer {i}', 'organization_name': 'Example Ltd', 'contact': '9800000000',
+        'organization_email': f'it{i}@example.com', 'issue_type': 'Hardware', 'priority': 'High',
+        'subject': f'Issue {i}', 'description': 'Switch reboots under load', 'status': rng.choice(['open', 'closed']),
+        'created_at': created(i)
+    } for i in range(scale)])
+    db.session.execute(insert(Inquiry), [{
+        'name': f'Customer {i}', 'organization_name': 'Example Ltd', 'contact': '9800000000',
+        'organization_email': f'info{i}@example.com', 'subject': f'Inquiry {i}', 'message': 'Pricing please',
+        'status': rng.choice(['unread', 'read']), 'created_at': created(i)
+    } for i in range(scale)])
+    db.session.execute(insert(EventRegistration), [{
+        'event_id': rng.choice(event_ids), 'event_name': 'Event', 'event_date': '2025-01-01', 'event_time': '10:00',
+        'event_price': 'Free', 'name': f'Attendee {i}', 'contact': '9800000000', 'email': f'attendee{i}@example.com',
+        'status': 'registered', 'created_at': created(i)
+    } for i in range(scale)])
+
+    reconcile_counters()
+    reindex()
+
+# Measurement
+
+def _percentile(quantiles, p):
+    return quantiles[p - 1]
+
+def measure(fn, iterations, warmup, alloc_iterations):
+    for _ in range(max(1, warmup)):
+        fn()
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    allocated = []
+    peaks = []
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+        allocated.append(after - before)
+        peaks.append(peak - before)
+    tracemalloc.stop()
+
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'iterations': iterations,
+        'p50_ms': round(_percentile(quantiles, 50) * 1000, 4),
+        'p95_ms': round(_percentile(quantiles, 95) * 1000, 4),
+        'p99_ms': round(_percentile(quantiles, 99) * 1000, 4),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 4),
+        'min_ms': round(min(timings) * 1000, 4),
+        'retained_bytes_per_op': int(statistics.median(allocated)) if allocated else None,
+        'peak_bytes_per_op': int(statistics.median(peaks)) if peaks else None
+    }
+
+def request_case(client, method, path, expected_status=200, payload=None):
+    def run():
+        response = client.open(path, method=method, json=payload() if payload else None)
+        if response.status_code != expected_status:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.data[:200]!r}")
+        response.close()
+    return run
+
+def serialize_case(model):
+    objects = []
+    def run():
+        # Loaded on the first (warmup) call, inside the app context the case is measured in,
+        # so lazy relationships that to_dict() touches resolve once and stay in the identity map
+        if not objects:
+            objects.extend(model.query.limit(SERIALIZE_BATCH).all())
+        for obj in objects:
+            obj.to_dict()
+    return run
+
+def form_payloads(rng):
+    counter = iter(range(10 ** 9))
+    # Unique content per call so duplicate collapsing doesn't turn posts into replays
+    def quote():
+        n = next(counter)
+        return {'name': f'Bench {n}', 'contact': '9800000000', 'officeEmail': f'b{n}@example.com',
+                'productName': f'Product {rng.randrange(1000)}', 'quantity': 1, 'requirements': f'req {n}'}
+    def support():
+        n = next(counter)
+        return {'name': f'Bench {n}', 'organizationName': 'Example', 'contact': '9800000000',
+                'organizationEmail': f'b{n}@example.com', 'issueType': 'Hardware', 'priority': 'High',
+                'subject': f'Case {n}', 'description': 'Down'}
+    def inquiry():
+        n = next(counter)
+        return {'name': f'Bench {n}', 'organizationName': 'Example', 'contact': '9800000000',
+                'organizationEmail': f'b{n}@example.com', 'subject': f'Inquiry {n}', 'message': 'Hello'}
+    def registration():
+        n = next(counter)
+        return {'name': f'Bench {n}', 'contact': '9800000000', 'email': f'b{n}@example.com',
+                'eventName': 'Event 0', 'eventDate': '2025-01-01', 'eventTime': '10:00', 'eventPrice': 'Free'}
+    return quote, support, inquiry, registration
+
+def build_cases(client, rng):
+    """``{name: (fn, needs an app context)}``; only direct ORM calls get one pushed."""
+    cases = {}
+    for model in (Product, Brand, Category, Service, Event, Admin,
+                  QuoteRequest, SupportCase, Inquiry, EventRegistration):
+        cases[f'to_dict.{model.__name__}'] = (serialize_case(model), True)
+
+    for path in ('brands', 'categories', 'products', 'services', 'events',
+                 'quote-requests', 'support-cases', 'inquiries', 'event-registrations'):
+        cases[f'admin.list.{path}'] = (request_case(client, 'GET', f'/api/admin/{path}'), False)
+    cases['admin.dashboard'] = (request_case(client, 'GET', '/api/admin/dashboard'), False)
+
+    quote, support, inquiry, registration = form_payloads(rng)
+    cases['form.quote-request'] = (request_case(client, 'POST', '/api/quote-request', 201, quote), False)
+    cases['form.support-case'] = (request_case(client, 'POST', '/api/support-case', 201, support), False)
+    cases['form.inquiry'] = (request_case(client, 'POST', '/api/inquiry', 201, inquiry), False)
+    cases['form.event-registration'] = (request_case(client, 'POST', '/api/event-registration', 201, registration), False)
+
+    cases['serve.index'] = (request_case(client, 'GET', '/'), False)
+    cases['serve.spa_route'] = (request_case(client, 'GET', '/admin/dashboard'), False)
+    return cases
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline, threshold):
+    """Print p50 changes against ``baseline``; returns the names that regressed."""
+    regressions = []
+    for key in ('scale', 'iterations'):
+        if baseline['meta'].get(key) != results['meta'][key]:
+            print(f"Warning: baseline {key} {baseline['meta'].get(key)} differs from {results['meta'][key]}")
+    print(f"\n{'case':40} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for name, result in results['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            print(f"{name:40} {'-':>10} {result['p50_ms']:>10.3f} {'new':>8}")
+            continue
+        change = (result['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+        flag = ' !' if change > threshold else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:40} {old['p50_ms']:>10.3f} {result['p50_ms']:>10.3f} {change:>+7.1f}%{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1000, help='Products and submissions of each type to seed.')
+    parser.add_argument('--iterations', type=int, default=200, help='Timed iterations per case.')
+    parser.add_argument('--warmup', type=int, default=20, help='Untimed iterations per case.')
+    parser.add_argument('--alloc-iterations', type=int, default=20, help='Iterations under tracemalloc per case.')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the generated data.')
+    parser.add_argument('--filter', default='', help='Only run cases whose name contains this.')
+    parser.add_argument('--output', help='Write JSON results here.')
+    parser.add_argument('--compare', help='Baseline JSON results to diff against.')
+    parser.add_argument('--threshold', type=float, default=10.0, help='p50 regression percentage that fails --compare.')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(directory, 'bench.db')}",
+            'RATE_LIMIT_ENABLED': False,
+            'STARTUP_REPORT': False,
+            'TESTING': True
+        })
+        with app.app_context():
+            upgrade(echo=lambda *a: None)
+            seed(echo=lambda *a: None)
+            started = time.perf_counter()
+            seed_benchmark_data(args.scale, rng)
+            db.session.commit()
+            print(f"Seeded scale {args.scale} in {time.perf_counter() - started:.1f}s")
+
+        client = app.test_client()
+        response = client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin'})
+        if response.status_code != 200:
+            raise SystemExit(f"Admin login failed: {response.status_code}")
+
+        results = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': datetime.utcnow().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'sqlalchemy': sqlalchemy.__version__,
+                'platform': platform.platform(),
+                'scale': args.scale,
+                'iterations': args.iterations,
+                'seed': args.seed
+            },
+            'results': {}
+        }
+        print(f"{'case':40} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KiB':>9}")
+        for name, (fn, needs_app_context) in build_cases(client, rng).items():
+            if args.filter not in name:
+                continue
+            # Request cases get no outer context: each request pushes and tears down its own
+            # (g, session, cache versions) as in production, instead of inheriting one across iterations
+            with app.app_context() if needs_app_context else nullcontext():
+                result = measure(fn, args.iterations, args.warmup, args.alloc_iterations)
+            results['results'][name] = result
+            peak = result['peak_bytes_per_op']
+            print(f"{name:40} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+                  f"{peak / 1024 if peak is not None else 0:>9.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} cases regressed by more than {args.threshold}%")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+# gunicorn -c gunicorn.conf.py src.wsgi:app
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5002')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# Import and build the app once in the master; workers share it copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+def on_starting(server):
+    # Metrics snapshots from a previous run would be counted again
+    directory = os.environ.get('METRICS_MULTIPROC_DIR') or os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.startswith('metrics_'):
+                os.remove(os.path.join(directory, name))
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach, so the
+    # first collection in a worker doesn't write to (and copy) shared pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    # Engine pools are already reset by an at-fork hook (src/utils/db_pool.py)
+    from src.main import start_background_workers
+    from src.wsgi import app
+    start_background_workers(app)
@@ -0,0 +1,228 @@
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from src.models.user import db
+from src.models.outbox import EmailOutbox
+from src.migrations import MIGRATIONS, SchemaOutOfDate, applied_versions, current_version, latest_version, seed, upgrade
+from src.utils.counters import reconcile_counters
+from src.utils.mailer import OutboxWorker, outbox_status_counts
+from src.utils.query_plans import check_query_plans
+from src.utils.rate_limit import create_bucket_table
+from src.utils.retention import archive_expired, count_expired, load_policies
+from src.utils.search import reindex
+from src.utils.static_files import compress_static
+from src.utils.synthetic import CHUNK_SIZE, SyntheticPlan, existing_events, existing_reference_ids, finish_load, generate, table_offsets
+
+counters_cli = AppGroup('counters', help='Dashboard counter maintenance.')
+
+@counters_cli.command('reconcile')
+def reconcile_counters_command():
+    """Recompute every dashboard counter from its source table."""
+    values = reconcile_counters()
+    db.session.commit()
+    for name, value in values.items():
+        click.echo(f"{name}: {value}")
+
+outbox_cli = AppGroup('outbox', help='Email outbox delivery.')
+
+@outbox_cli.command('run')
+@click.option('--threads', default=4, show_default=True, help='Concurrent delivery threads.')
+@click.option('--batch-size', default=20, show_default=True, help='Messages claimed per poll.')
+@click.option('--once', is_flag=True, help='Drain what is due now and exit.')
+def run_outbox_command(threads, batch_size, once):
+    """Deliver queued email until interrupted."""
+    worker = OutboxWorker(current_app._get_current_object(), threads=threads, batch_size=batch_size)
+    if once:
+        while worker.run_once():
+            pass
+        worker.pool.close()
+        click.echo(worker.stats.to_dict())
+        return
+
+    worker.start()
+    try:
+        while True:
+            time.sleep(60)
+            click.echo(worker.stats.to_dict())
+    except KeyboardInterrupt:
+        worker.stop()
+
+@outbox_cli.command('stats')
+def outbox_stats_command():
+    """Show message counts per outbox status."""
+    for status, count in sorted(outbox_status_counts().items()):
+        click.echo(f"{status}: {count}")
+
+@outbox_cli.command('retry-dead')
+def retry_dead_command():
+    """Move dead-lettered messages back to pending."""
+    count = EmailOutbox.query.filter_by(status='dead').update({'status': 'pending', 'attempts': 0})
+    db.session.commit()
+    click.echo(f"Requeued {count} messages")
+
+static_cli = AppGroup('static', help='Static asset maintenance.')
+
+@static_cli.command('compress')
+@click.option('--min-size', default=1024, show_default=True, help='Skip files smaller than this many bytes.')
+def compress_static_command(min_size):
+    """Pre-build .gz/.br variants of the static folder after a frontend deploy."""
+    written = compress_static(current_app.static_folder, min_size=min_size)
+    for path in written:
+        click.echo(path)
+    click.echo(f"Wrote {len(written)} files")
+
+search_cli = AppGroup('search', help='Catalog full-text search index.')
+
+@search_cli.command('reindex')
+def reindex_command():
+    """Rebuild the search index from the active catalog rows."""
+    count = reindex()
+    db.session.commit()
+    click.echo(f"Indexed {count} documents")
+
+db_cli = AppGroup('db', help='Schema migrations and default data.')
+
+@db_cli.command('upgrade')
+@click.option('--to', 'target', type=int, help='Stop after this version.')
+def upgrade_command(target):
+    """Apply pending schema migrations."""
+    applied = upgrade(target=target, echo=click.echo)
+    click.echo(f"Applied {len(applied)} migrations" if applied else "Schema is up to date")
+
+    rate_limit_url = current_app.config.get('RATE_LIMIT_DATABASE_URL')
+    if rate_limit_url and rate_limit_url != current_app.config['SQLALCHEMY_DATABASE_URI']:
+        create_bucket_table(rate_limit_url)
+        click.echo("Rate limit buckets table is ready")
+
+@db_cli.command('seed')
+def seed_command():
+    """Create the default admin and catalog rows if they are missing."""
+    try:
+        seed(echo=click.echo)
+    except SchemaOutOfDate as e:
+        raise click.ClickException(str(e))
+    click.echo("Database seeded")
+
+@db_cli.command('current')
+def current_command():
+    """Show applied and pending migrations."""
+    applied = applied_versions()
+    for version, name, _ in MIGRATIONS:
+        click.echo(f"{version} {name}: {'applied' if version in applied else 'pending'}")
+
+@db_cli.command('check-plans')
+@click.option('--verbose', '-v', is_flag=True, help='Print every plan, not just failing ones.')
+def check_plans_command(verbose):
+    """Verify the hot queries are planned on their indexes."""
+    try:
+        results = check_query_plans()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    failed = [result for result in results if not result['ok']]
+    for result in results:
+        click.echo(f"{'ok  ' if result['ok'] else 'FAIL'} {result['name']} ({result['index']})")
+        if verbose or not result['ok']:
+            for line in result['plan']:
+                click.echo(f"       {line}")
+    if failed:
+        raise click.ClickException(f"{len(failed)} of {len(results)} queries are not using their index")
+    click.echo(f"All {len(results)} queries use their index")
+
+@db_cli.command('generate')
+@click.option('--seed', 'random_seed', default=0, show_default=True, help='Same seed, same data.')
+@click.option('--brands', default=50, show_default=True)
+@click.option('--categories', default=20, show_default=True)
+@click.option('--products', default=10_000, show_default=True)
+@click.option('--events', default=200, show_default=True)
+@click.option('--submissions', default=100_000, show_default=True, help='Rows for each submission table not set below.')
+@click.option('--quote-requests', type=int, help='Overrides --submissions.')
+@click.option('--support-cases', type=int, help='Overrides --submissions.')
+@click.option('--inquiries', type=int, help='Overrides --submissions.')
+@click.option('--event-registrations', type=int, help='Overrides --submissions.')
+@click.option('--days', default=730, show_default=True, help='Spread created_at over this many days.')
+@click.option('--end', type=click.DateTime(), help='Newest created_at (default now); fix it for repeatable output.')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Generator processes.')
+@click.option('--chunk-size', default=CHUNK_SIZE, show_default=True, help='Rows per INSERT transaction.')
+@click.option('--skip-search', is_flag=True, help='Leave the search index for a later `flask search reindex`.')
+def generate_command(random_seed, brands, categories, products, events, submissions, quote_requests,
+                     support_cases, inquiries, event_registrations, days, end, workers, chunk_size, skip_search):
+    """Bulk load deterministic synthetic data for load testing."""
+    if current_version() < latest_version():
+        raise click.ClickException('Database schema is out of date; run `flask db upgrade` first')
+
+    counts = {
+        'brands': brands,
+        'categories': categories,
+        'products': products,
+        'events': events,
+        'quote_requests': submissions if quote_requests is None else quote_requests,
+        'support_cases': submissions if support_cases is None else support_cases,
+        'inquiries': submissions if inquiries is None else inquiries,
+        'event_registrations': submissions if event_registrations is None else event_registrations
+    }
+    plan = SyntheticPlan(
+        counts, table_offsets(), seed=random_seed, end=end, days=days,
+        chunk_size=chunk_size, existing_ids=existing_reference_ids(counts), existing_events=existing_events(counts)
+    )
+    # Release the session's connection; SQLite workers would otherwise wait on its lock
+    db.session.commit()
+
+    started = time.perf_counter()
+    try:
+        totals = generate(db.engine.url.render_as_string(hide_password=False), plan, workers=workers, echo=click.echo)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    indexed = finish_load(totals, index_search=not skip_search)
+    db.session.commit()
+
+    rows = sum(totals.values())
+    elapsed = time.perf_counter() - started
+    click.echo(f"Generated {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)"
+               + (f", indexed {indexed} documents" if indexed else ''))
+
+retention_cli = AppGroup('retention', help='Archival of old form submissions.')
+
+def _retention_policies(submission_types):
+    try:
+        policies = load_policies(current_app.config.get('RETENTION_POLICIES'))
+    except (TypeError, ValueError) as e:
+        raise click.ClickException(f'Invalid RETENTION_POLICIES: {e}')
+    unknown = set(submission_types) - set(policies)
+    if unknown:
+        raise click.ClickException(f"No retention policy for: {', '.join(sorted(unknown))}")
+    return [policies[name] for name in submission_types] if submission_types else list(policies.values())
+
+@retention_cli.command('run')
+@click.option('--type', 'submission_types', multiple=True, help='Only this submission type (repeatable).')
+@click.option('--chunk-size', type=int, help='Rows moved per transaction (default RETENTION_CHUNK_SIZE).')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between chunks.')
+@click.option('--limit', type=int, help='Stop after this many rows per type.')
+@click.option('--dry-run', is_flag=True, help='Only count what would be archived.')
+def run_retention_command(submission_types, chunk_size, pause, limit, dry_run):
+    """Move submissions past their retention policy into the archive."""
+    chunk_size = chunk_size or current_app.config.get('RETENTION_CHUNK_SIZE', 1000)
+    for policy in _retention_policies(submission_types):
+        if dry_run:
+            click.echo(f"{policy.submission_type}: {count_expired(policy)} due")
+            continue
+        started = time.perf_counter()
+        count = archive_expired(policy, chunk_size=chunk_size, pause=pause, limit=limit, echo=click.echo)
+        click.echo(f"{policy.submission_type}: archived {count} in {time.perf_counter() - started:.1f}s")
+
+@retention_cli.command('policies')
+def retention_policies_command():
+    """Show the retention policy for each submission type."""
+    for policy in _retention_policies(()):
+        click.echo(f"{policy.submission_type}: {policy.to_dict()}")
+
+def register_commands(app):
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(static_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(retention_cli)
@@ -1,169 +1,221 @@
+import json
 import os
 import sys
-import hashlib
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import time
+
+_import_started = time.perf_counter()
 
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import Database and Models
 from src.models.user import db
 from src.models.admin import Brand, Category, Product, Service, Event, Admin
 from src.models.forms import QuoteRequest, SupportCase, Inquiry, EventRegistration
+from src.models.dashboard import DashboardCounter
+from src.models.outbox import EmailOutbox
+from src.models.cache import CacheVersion
+from src.models.idempotency import IdempotencyKey
+from src.models.schema import SchemaVersion
+from src.models.archive import ArchivedSubmission
 from src.routes.user import user_bp
 from src.routes.forms import forms_bp
 from src.routes.admin import admin_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'techbucket-secret-key-2025')
-
-# Enable CORS for Production
-CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
-
-# Email Configuration (Zoho Mail)
-app.config['MAIL_SERVER'] = 'smtp.zoho.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'admin@techbucket.com.np'
-app.config['MAIL_PASSWORD'] = 'Uzumaki@123'
-app.config['MAIL_DEFAULT_SENDER'] = 'admin@techbucket.com.np'
-
-# Register Blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(forms_bp, url_prefix='/api')
-app.register_blueprint(admin_bp)
-
-# --- DATABASE CONFIGURATION ---
-database_url = os.environ.get('DATABASE_URL')
-
-# SQLAlchemy requires 'postgresql://' instead of 'postgres://'
-if database_url and database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
-
-# Use Supabase if available, otherwise fallback to local SQLite
-app.config['SQLALCHEMY_DATABASE_URI'] = database_url or f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Ensure database directory exists (for local fallback only)
-os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
-
-# Initialize database with app
-db.init_app(app)
-
-# Email sending function
-def send_email(to_emails, subject, body):
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = app.config['MAIL_DEFAULT_SENDER']
-        msg['To'] = ', '.join(to_emails) if isinstance(to_emails, list) else to_emails
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        server = smtplib.SMTP(app.config['MAIL_SERVER'], app.config['MAIL_PORT'])
-        server.starttls()
-        server.login(app.config['MAIL_USERNAME'], app.config['MAIL_PASSWORD'])
-        
-        text = msg.as_string()
-        server.sendmail(app.config['MAIL_DEFAULT_SENDER'], to_emails, text)
-        server.quit()
-        
-        print(f"EMAIL SENT SUCCESSFULLY to {to_emails}")
-        return True
-    except Exception as e:
-        print(f"EMAIL SENDING FAILED: {str(e)}")
-        return False
-
-app.send_email = send_email
-
-# Initialize database and create default data
-def init_database():
-    with app.app_context():
-        # Tables are created based on the imports at the top of the file
-        db.create_all()
-        
-        # Create default admin if not exists
-        admin = Admin.query.filter_by(username='admin').first()
-        if not admin:
-            default_admin = Admin(
-                username='admin',
-                password=hashlib.sha256('admin'.encode()).hexdigest(),
-                email='admin@techbucket.com.np',
-                role='admin'
+from src.routes.catalog import catalog_bp
+from src.routes.health import health_bp
+from src.utils.counters import start_reconcile_thread
+from src.utils.db_pool import dispose_engines_after_fork, engine_options, register_pool_metrics
+from src.utils.mailer import start_outbox_worker
+from src.utils.metrics import init_metrics
+from src.utils.sql_profiler import init_sql_profiler
+from src.utils.static_files import StaticIndex
+from src.utils.startup import StartupReport
+from src.commands import register_commands
+from src.migrations import seed, upgrade
+
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+def load_config(app):
+    """Settings from the environment; ``create_app(config)`` overrides win."""
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'techbucket-secret-key-2025')
+    app.config['CATALOG_CACHE_MAX_AGE'] = int(os.environ.get('CATALOG_CACHE_MAX_AGE', 60))
+    app.config['CATALOG_CACHE_SIZE'] = int(os.environ.get('CATALOG_CACHE_SIZE', 256))
+    app.config['CATALOG_CACHE_TTL'] = int(os.environ.get('CATALOG_CACHE_TTL', 300))
+    app.config['ADMIN_REVALIDATE_INTERVAL'] = int(os.environ.get('ADMIN_REVALIDATE_INTERVAL', 60))
+    app.config['ADMIN_LAST_LOGIN_RESOLUTION'] = int(os.environ.get('ADMIN_LAST_LOGIN_RESOLUTION', 300))
+    app.config['STARTUP_REPORT'] = os.environ.get('STARTUP_REPORT', 'true').lower() == 'true'
+    # The deployment sits behind one reverse proxy (Render), which appends the
+    # visitor's address to X-Forwarded-For; without trusting that hop every
+    # request shares the proxy's IP and one rate-limit bucket. Set 0 when the
+    # app is reachable directly, since the header is then client-controlled.
+    app.config['PROXY_FIX_X_FOR'] = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+
+    # Prometheus metrics at /metrics (see src/utils/metrics.py)
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    app.config['METRICS_MULTIPROC_DIR'] = os.environ.get('METRICS_MULTIPROC_DIR') or os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Opt-in SQL profiler: per-request query counts, N+1 and slow-query logging (see src/utils/sql_profiler.py)
+    app.config['SQL_PROFILER'] = os.environ.get('SQL_PROFILER', 'false').lower() == 'true'
+    app.config['SQL_SLOW_QUERY_MS'] = float(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+
+    # Rate limiting for the public form endpoints (see src/utils/rate_limit.py)
+    app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    app.config['RATE_LIMIT_DATABASE_URL'] = os.environ.get('RATE_LIMIT_DATABASE_URL')
+    app.config['RATE_LIMIT_FORMS_PER_MINUTE'] = float(os.environ.get('RATE_LIMIT_FORMS_PER_MINUTE', 10))
+    app.config['RATE_LIMIT_FORMS_BURST'] = int(os.environ.get('RATE_LIMIT_FORMS_BURST', 5))
+    app.config['RATE_LIMIT_FAIL_OPEN'] = os.environ.get('RATE_LIMIT_FAIL_OPEN', 'true').lower() == 'true'
+
+    # Repeated form posts replay the first response (see src/utils/idempotency.py)
+    app.config['IDEMPOTENCY_KEY_TTL'] = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 3600))
+    app.config['IDEMPOTENCY_CONTENT_WINDOW'] = int(os.environ.get('IDEMPOTENCY_CONTENT_WINDOW', 600))
+
+    # Submission retention for `flask retention run` (see src/utils/retention.py)
+    app.config['RETENTION_POLICIES'] = json.loads(os.environ.get('RETENTION_POLICIES') or '{}')
+    app.config['RETENTION_CHUNK_SIZE'] = int(os.environ.get('RETENTION_CHUNK_SIZE', 1000))
+
+    # Email Configuration (Zoho Mail)
+    app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.zoho.com')
+    app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
+    app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME', 'admin@techbucket.com.np')
+    app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', 'Uzumaki@123')
+    app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'admin@techbucket.com.np')
+    app.config['MAIL_OUTBOX_MAX_ATTEMPTS'] = int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', 8))
+
+    # --- DATABASE CONFIGURATION ---
+    database_url = os.environ.get('DATABASE_URL')
+
+    # SQLAlchemy requires 'postgresql://' instead of 'postgres://'
+    if database_url and database_url.startswith("postgres://"):
+        database_url = database_url.replace("postgres://", "postgresql://", 1)
+
+    # Use Supabase if available, otherwise fallback to local SQLite
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url or f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Connection pool (see src/utils/db_pool.py)
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
+def create_app(config=None):
+    """
+    Build the application. Nothing here touches the database, so the app can
+    be built once in gunicorn's master (``--preload``) and shared by workers.
+    """
+    report = StartupReport(import_seconds=IMPORT_SECONDS)
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+
+    with report.phase('config'):
+        load_config(app)
+        app.config.update(config or {})
+        if 'SQLALCHEMY_ENGINE_OPTIONS' not in app.config:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+                app.config['SQLALCHEMY_DATABASE_URI'],
+                pool_size=app.config['DB_POOL_SIZE'],
+                max_overflow=app.config['DB_MAX_OVERFLOW'],
+                pool_timeout=app.config['DB_POOL_TIMEOUT'],
+                pool_recycle=app.config['DB_POOL_RECYCLE'],
+                pool_pre_ping=app.config['DB_POOL_PRE_PING']
             )
-            db.session.add(default_admin)
-        
-        # Create default brands if not exist
-        if Brand.query.count() == 0:
-            brands = [
-                Brand(name='Cisco', description='Leading networking equipment manufacturer'),
-                Brand(name='Dell', description='Enterprise server and computing solutions'),
-                Brand(name='HP', description='Hewlett Packard Enterprise solutions')
-            ]
-            db.session.add_all(brands)
-        
-        # Create default categories if not exist
-        if Category.query.count() == 0:
-            categories = [
-                Category(name='Networking', description='Network infrastructure equipment'),
-                Category(name='Servers', description='Server hardware and solutions'),
-                Category(name='Wireless', description='Wireless networking solutions')
-            ]
-            db.session.add_all(categories)
-        
-        # Create default services if not exist
-        if Service.query.count() == 0:
-            services = [
-                Service(
-                    title='Network Infrastructure Design',
-                    description='Comprehensive network design and planning services',
-                    features=['Network topology design', 'Scalability planning', 'Security integration'],
-                    benefits=['Optimized performance', 'Future-ready infrastructure', 'Cost-effective solutions'],
-                    process=['Requirements analysis', 'Design planning', 'Implementation roadmap'],
-                    icon='network'
-                ),
-                Service(
-                    title='Network Infrastructure Implementation',
-                    description='Professional network deployment and configuration',
-                    features=['Equipment installation', 'Configuration management', 'Testing and validation'],
-                    benefits=['Expert deployment', 'Minimal downtime', 'Quality assurance'],
-                    process=['Site preparation', 'Equipment installation', 'Configuration and testing'],
-                    icon='implementation'
-                )
-            ]
-            db.session.add_all(services)
-        
-        try:
-            db.session.commit()
-            print("Database initialized successfully!")
-        except Exception as e:
-            db.session.rollback()
-            print(f"Error initializing database: {e}")
-
-# Call initialization
-init_database()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if not static_folder_path:
-        return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+
+    with report.phase('extensions'):
+        # Behind a reverse proxy, trust this many X-Forwarded-For hops for the client IP
+        if app.config['PROXY_FIX_X_FOR']:
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+        # Enable CORS for Production; the admin frontend pages submission lists by X-Next-Cursor
+        CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True, expose_headers=['X-Next-Cursor'])
+
+        # Ensure database directory exists (for local fallback only)
+        os.makedirs(os.path.join(os.path.dirname(__file__), 'database'), exist_ok=True)
+
+        # Initialize database with app; engines are created here but connect lazily
+        db.init_app(app)
+        dispose_engines_after_fork(app)
+
+        if app.config['METRICS_ENABLED']:
+            init_metrics(app)
+            register_pool_metrics(app)
+        if app.config['SQL_PROFILER']:
+            init_sql_profiler(app)
+
+    with report.phase('blueprints'):
+        # Register Blueprints
+        app.register_blueprint(user_bp, url_prefix='/api')
+        app.register_blueprint(forms_bp, url_prefix='/api')
+        app.register_blueprint(admin_bp)
+        app.register_blueprint(catalog_bp)
+        app.register_blueprint(health_bp)
+
+        # Register CLI commands (flask db ..., flask counters ..., flask outbox ..., flask static ..., flask search ..., flask retention ...)
+        register_commands(app)
+
+    with report.phase('static_index'):
+        # Index the static folder once; preloaded workers share it copy-on-write
+        static_index = StaticIndex(app.static_folder)
+        app.extensions['static_index'] = static_index
+
+        @app.route('/', defaults={'path': ''})
+        @app.route('/<path:path>')
+        def serve(path):
+            if not app.static_folder:
+                return "Static folder not configured", 404
+
+            # Pick up rebuilt frontend files without a restart while developing
+            if app.debug:
+                static_index.refresh()
+            return static_index.serve(path)
+
+    # Schema and default data are managed per deploy with `flask db upgrade` and
+    # `flask db seed` (src/migrations.py), so workers start without touching them
+
+    app.extensions['startup_report'] = report.to_dict()
+    if app.config['STARTUP_REPORT']:
+        print(report.summary())
+    return app
+
+_app = None
+
+def __getattr__(name):
+    # `gunicorn src.main:app` and `flask --app src.main:app` predate the
+    # factory; build their app on first access instead of at import, so
+    # importing src.main (tests, src.wsgi) still costs nothing
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def start_background_workers(app):
+    """
+    Threads don't survive a fork, so these start in each worker after it is
+    forked (see gunicorn.conf.py), never in a preloading master.
+    """
+    # Periodically correct counter drift from writes that bypass the ORM
+    if os.environ.get('COUNTER_RECONCILE_INTERVAL'):
+        start_reconcile_thread(app, int(os.environ['COUNTER_RECONCILE_INTERVAL']))
+
+    # Deliver queued email from this process (otherwise run `flask outbox run`)
+    if os.environ.get('MAIL_OUTBOX_THREADS'):
+        start_outbox_worker(app, int(os.environ['MAIL_OUTBOX_THREADS']))
 
 if __name__ == '__main__':
+    app = create_app()
+    # The development server sets up its own database
+    with app.app_context():
+        upgrade()
+        seed()
+    start_background_workers(app)
     port = int(os.environ.get('PORT', 5002))
     app.run(host='0.0.0.0', port=port, debug=False)
@@ -0,0 +1,269 @@
+"""
+Versioned schema migrations and default data.
+
+Run once per deploy, before the new workers start:
+
+    flask db upgrade   # apply pending migrations
+    flask db seed      # default admin, brands, categories and services
+
+Applied versions are recorded in ``schema_versions``. Each migration runs in
+its own transaction and, on PostgreSQL, under an advisory lock, so two
+deploy hooks racing each other apply it exactly once. Migrations must be
+safe on databases created by the old boot-time ``create_all()``: create
+with ``checkfirst`` and never assume a table is missing.
+"""
+import hashlib
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from src.models.user import db
+from src.models.admin import Admin, Brand, Category, Service
+from src.models.cache import CacheVersion
+from src.models.schema import SchemaVersion
+from src.utils.cache import ensure_cache_versions
+from src.utils.counters import reconcile_counters
+from src.utils.rate_limit import rate_limit_buckets
+from src.utils.search import create_search_index, reindex
+
+# Arbitrary constant shared by every process running migrations
+MIGRATION_LOCK_ID = 72_318_001
+
+INITIAL_TABLES = (
+    'user', 'admins', 'brands', 'categories', 'products', 'services', 'events',
+    'quote_requests', 'support_cases', 'inquiries', 'event_registrations',
+    'dashboard_counters', 'email_outbox', 'cache_versions', 'idempotency_keys'
+)
+
+# Indexes each migration owns. A migration only ever builds its own, so a
+# database upgraded from version 0 gets the later ones from the migration
+# meant to build them (online, for the access path indexes) rather than
+# from initial_schema inside one long write-blocking transaction.
+INITIAL_INDEXES = (
+    'ix_products_active_brand_category_price',
+    'ix_idempotency_keys_expires_at'
+)
+ACCESS_PATH_INDEXES = (
+    'ix_products_active_featured_created', 'ix_products_created_id',
+    'ix_products_brand_id', 'ix_products_category_id',
+    'ix_services_active_featured',
+    'ix_events_active_date_time', 'ix_events_created_id',
+    'ix_quote_requests_created_id', 'ix_quote_requests_status_created',
+    'ix_support_cases_created_id', 'ix_support_cases_status_created',
+    'ix_inquiries_created_id', 'ix_inquiries_status_created',
+    'ix_event_registrations_created_id', 'ix_event_registrations_status_created',
+    'ix_event_registrations_event_status'
+)
+
+class SchemaOutOfDate(Exception):
+    pass
+
+def _index(name):
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(f'No index named {name}')
+
+def _create_tables(connection, table_names, index_names=None):
+    """
+    Create the missing ``table_names`` (in dependency order) and then
+    ``index_names``; ``None`` means every index the tables declare, for
+    tables new in that migration.
+    """
+    inspector = inspect(connection)
+    tables = [table for table in db.metadata.sorted_tables if table.name in table_names]
+    for table in tables:
+        if not inspector.has_table(table.name):
+            # CreateTable alone, unlike create_all(), leaves the indexes out
+            connection.execute(CreateTable(table))
+    if index_names is None:
+        indexes = [index for table in tables for index in table.indexes]
+    else:
+        indexes = [_index(name) for name in index_names]
+    for index in indexes:
+        index.create(connection, checkfirst=True)
+
+def initial_schema(connection):
+    _create_tables(connection, INITIAL_TABLES, INITIAL_INDEXES)
+
+def catalog_search(connection):
+    if inspect(connection).has_table('catalog_search'):
+        return
+    create_search_index(connection)
+    reindex()
+
+def submission_archive(connection):
+    _create_tables(connection, ('archived_submissions',))
+
+def _build_index_online(connection, index):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL, so writes to the table carry on
+    while it builds. That cannot run inside a transaction, so it goes through
+    its own autocommit connection (the migration's transaction has only
+    read schema_versions, so the build does not wait on it). A build that
+    failed half way leaves an INVALID index behind, which is dropped and
+    rebuilt.
+    """
+    with connection.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as online:
+        valid = online.execute(text(
+            "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ), {'name': index.name}).scalar()
+        if valid:
+            return
+        if valid is not None:
+            online.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+        ddl = str(CreateIndex(index).compile(dialect=online.dialect))
+        online.execute(text(ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)))
+
+def access_path_indexes(connection):
+    # Indexes for the admin lists, dashboard counters, catalog filters and retention
+    for name in ACCESS_PATH_INDEXES:
+        index = _index(name)
+        if connection.dialect.name == 'postgresql':
+            _build_index_online(connection, index)
+        else:
+            index.create(connection, checkfirst=True)
+
+def _add_cache_version(connection, table_name):
+    # bump_versions() only updates existing rows; seed() creates the rest
+    table = CacheVersion.__table__
+    if connection.execute(table.select().where(table.c.table_name == table_name)).first() is None:
+        connection.execute(table.insert().values(table_name=table_name, version=0))
+
+def admin_cache_version(connection):
+    _add_cache_version(connection, 'admins')
+
+def registration_cache_version(connection):
+    _add_cache_version(connection, 'event_registrations')
+
+def rate_limit_table(connection):
+    # Shared token buckets for RATE_LIMIT_BACKEND=database; a separate
+    # RATE_LIMIT_DATABASE_URL gets the same table from `flask db upgrade`
+    rate_limit_buckets.create(connection, checkfirst=True)
+
+def catalog_cache_versions(connection):
+    # Until now only seed() created these, so an upgraded but unseeded
+    # database bumped nothing and served stale catalog caches
+    for table_name in ('brands', 'categories', 'products', 'services', 'events'):
+        _add_cache_version(connection, table_name)
+
+# (version, name, migrate(connection)); append only, never renumber
+MIGRATIONS = [
+    (1, 'initial_schema', initial_schema),
+    (2, 'catalog_search', catalog_search),
+    (3, 'submission_archive', submission_archive),
+    (4, 'access_path_indexes', access_path_indexes),
+    (5, 'admin_cache_version', admin_cache_version),
+    (6, 'registration_cache_version', registration_cache_version),
+    (7, 'catalog_cache_versions', catalog_cache_versions),
+    (8, 'rate_limit_buckets', rate_limit_table)
+]
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+def _lock(connection):
+    """Serialize migration runs until the current transaction ends."""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:id)'), {'id': MIGRATION_LOCK_ID})
+
+def applied_versions():
+    connection = db.session.connection()
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return set()
+    return {version for (version,) in db.session.query(SchemaVersion.version)}
+
+def current_version():
+    return max(applied_versions(), default=0)
+
+def upgrade(target=None, echo=print):
+    """Apply pending migrations up to ``target`` (default all). Returns the versions applied."""
+    connection = db.session.connection()
+    _lock(connection)
+    SchemaVersion.__table__.create(connection, checkfirst=True)
+    db.session.commit()
+
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        connection = db.session.connection()
+        _lock(connection)
+        if version in applied_versions():
+            db.session.rollback()
+            continue
+        echo(f"Applying {version}: {name}")
+        try:
+            migrate(connection)
+            db.session.add(SchemaVersion(version=version, name=name))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+def seed(echo=print):
+    """Insert the default rows that are missing. Safe to run on every deploy."""
+    if current_version() < latest_version():
+        raise SchemaOutOfDate('Database schema is out of date; run `flask db upgrade` first')
+
+    # Create default admin if not exists
+    if not Admin.query.filter_by(username='admin').first():
+        db.session.add(Admin(
+            username='admin',
+            password=hashlib.sha256('admin'.encode()).hexdigest(),
+            email='admin@techbucket.com.np',
+            role='admin'
+        ))
+        echo("Created default admin")
+
+    # Create default brands if not exist
+    if Brand.query.count() == 0:
+        db.session.add_all([
+            Brand(name='Cisco', description='Leading networking equipment manufacturer'),
+            Brand(name='Dell', description='Enterprise server and computing solutions'),
+            Brand(name='HP', description='Hewlett Packard Enterprise solutions')
+        ])
+        echo("Created default brands")
+
+    # Create default categories if not exist
+    if Category.query.count() == 0:
+        db.session.add_all([
+            Category(name='Networking', description='Network infrastructure equipment'),
+            Category(name='Servers', description='Server hardware and solutions'),
+            Category(name='Wireless', description='Wireless networking solutions')
+        ])
+        echo("Created default categories")
+
+    # Create default services if not exist
+    if Service.query.count() == 0:
+        db.session.add_all([
+            Service(
+                title='Network Infrastructure Design',
+                description='Comprehensive network design and planning services',
+                features=['Network topology design', 'Scalability planning', 'Security integration'],
+                benefits=['Optimized performance', 'Future-ready infrastructure', 'Cost-effective solutions'],
+                process=['Requirements analysis', 'Design planning', 'Implementation roadmap'],
+                icon='network'
+            ),
+            Service(
+                title='Network Infrastructure Implementation',
+                description='Professional network deployment and configuration',
+                features=['Equipment installation', 'Configuration management', 'Testing and validation'],
+                benefits=['Expert deployment', 'Minimal downtime', 'Quality assurance'],
+                process=['Site preparation', 'Equipment installation', 'Configuration and testing'],
+                icon='implementation'
+            )
+        ])
+        echo("Created default services")
+
+    try:
+        reconcile_counters()
+        ensure_cache_versions()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
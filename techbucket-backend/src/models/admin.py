@@ -1,6 +1,10 @@
 from src.models.user import db
+from src.models.forms import EventRegistration
 from datetime import datetime
 
+# Registrations in this status no longer hold a seat
+CANCELLED_REGISTRATION_STATUS = 'cancelled'
+
 class Brand(db.Model):
     __tablename__ = 'brands'
     
@@ -55,6 +59,17 @@ class Category(db.Model):
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Catalog browsing filters (see /api/catalog/products)
+        db.Index('ix_products_active_brand_category_price', 'is_active', 'brand_id', 'category_id', 'price'),
+        # Featured products, newest first
+        db.Index('ix_products_active_featured_created', 'is_active', 'featured', 'created_at'),
+        # Admin list pages newest first on (created_at, id)
+        db.Index('ix_products_created_id', 'created_at', 'id'),
+        # Brand/category relationship loads and deletes
+        db.Index('ix_products_brand_id', 'brand_id'),
+        db.Index('ix_products_category_id', 'category_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -72,8 +87,8 @@ class Product(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include_relations=True):
+        data = {
             'id': self.id,
             'name': self.name,
             'description': self.description,
@@ -84,14 +99,46 @@ class Product(db.Model):
             'featured': self.featured,
             'brand_id': self.brand_id,
             'category_id': self.category_id,
-            'brand': self.brand.to_dict() if self.brand else None,
-            'category': self.category.to_dict() if self.category else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+        if include_relations:
+            data['brand'] = self.brand.to_dict() if self.brand else None
+            data['category'] = self.category.to_dict() if self.category else None
+        return data
+
+def serialize_products(products, normalized=False):
+    """
+    Serialize a list of products, building each brand/category dict only once.
+
+    Load ``products`` with ``joinedload(Product.brand)`` and
+    ``joinedload(Product.category)`` so this issues no further queries.
+    Returns ``(data, brands, categories)`` where the last two map id -> dict.
+    With ``normalized`` the product dicts only carry ``brand_id`` and
+    ``category_id``; otherwise the shared dicts are embedded as before.
+    """
+    brands = {}
+    categories = {}
+    data = []
+    for product in products:
+        if product.brand_id not in brands:
+            brands[product.brand_id] = product.brand.to_dict() if product.brand else None
+        if product.category_id not in categories:
+            categories[product.category_id] = product.category.to_dict() if product.category else None
+
+        item = product.to_dict(include_relations=False)
+        if not normalized:
+            item['brand'] = brands[product.brand_id]
+            item['category'] = categories[product.category_id]
+        data.append(item)
+    return data, brands, categories
 
 class Service(db.Model):
     __tablename__ = 'services'
+    __table_args__ = (
+        # Active services, featured first
+        db.Index('ix_services_active_featured', 'is_active', 'featured'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -122,6 +169,12 @@ class Service(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        # Active events in date order; equality column first so the range/order columns follow it
+        db.Index('ix_events_active_date_time', 'is_active', 'date', 'time'),
+        # Admin list pages newest first on (created_at, id)
+        db.Index('ix_events_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -141,7 +194,23 @@ class Event(db.Model):
     # Relationship
     registrations = db.relationship('EventRegistration', backref='event', lazy=True)
     
-    def to_dict(self):
+    @staticmethod
+    def registration_counts(event_ids):
+        """Non-cancelled registrations per event id, from one grouped query."""
+        if not event_ids:
+            return {}
+        rows = db.session.query(EventRegistration.event_id, db.func.count(EventRegistration.id)).filter(
+            EventRegistration.event_id.in_(event_ids),
+            # != alone would also drop registrations whose status is NULL
+            db.or_(EventRegistration.status.is_(None), EventRegistration.status != CANCELLED_REGISTRATION_STATUS)
+        ).group_by(EventRegistration.event_id).all()
+        return dict(rows)
+
+    def to_dict(self, registration_count=None):
+        # List endpoints pass the count from registration_counts(); a single
+        # event falls back to its own COUNT instead of loading every registration
+        if registration_count is None:
+            registration_count = Event.registration_counts([self.id]).get(self.id, 0)
         return {
             'id': self.id,
             'title': self.title,
@@ -155,7 +224,7 @@ class Event(db.Model):
             'status': self.status,
             'agenda': self.agenda,
             'is_active': self.is_active,
-            'registration_count': len(self.registrations),
+            'registration_count': registration_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,26 @@
+from src.models.user import db
+from datetime import datetime
+
+class ArchivedSubmission(db.Model):
+    """A form submission moved out of its hot table by the retention job."""
+    __tablename__ = 'archived_submissions'
+    __table_args__ = (
+        # /api/admin/archive/<type> pages newest first within one type
+        db.Index('ix_archived_submissions_type_created', 'submission_type', 'created_at', 'id'),
+        db.Index('ix_archived_submissions_type_source', 'submission_type', 'source_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    submission_type = db.Column(db.String(50), nullable=False)  # URL slug, e.g. support-cases
+    source_id = db.Column(db.Integer, nullable=False)  # id in the original table
+    status = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime)  # when the submission was made
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    data = db.Column(db.JSON, nullable=False)  # every column of the original row
+
+    def to_dict(self):
+        return dict(
+            self.data,
+            submission_type=self.submission_type,
+            archived_at=self.archived_at.isoformat() if self.archived_at else None
+        )
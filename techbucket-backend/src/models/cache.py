@@ -0,0 +1,16 @@
+from src.models.user import db
+from datetime import datetime
+
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+
+    table_name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'table_name': self.table_name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,16 @@
+from src.models.user import db
+from datetime import datetime
+
+class DashboardCounter(db.Model):
+    __tablename__ = 'dashboard_counters'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    reconciled_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'value': self.value,
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
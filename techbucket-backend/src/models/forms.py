@@ -4,6 +4,12 @@ from datetime import datetime
 # Update existing models to add missing fields
 class QuoteRequest(db.Model):
     __tablename__ = 'quote_requests'
+    __table_args__ = (
+        # Admin lists page newest first on (created_at, id) (see keyset_paginate)
+        db.Index('ix_quote_requests_created_id', 'created_at', 'id'),
+        # Dashboard counters, bulk status updates and retention filter on status
+        db.Index('ix_quote_requests_status_created', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     product_name = db.Column(db.String(200), nullable=False)
@@ -34,6 +40,12 @@ class QuoteRequest(db.Model):
 
 class SupportCase(db.Model):
     __tablename__ = 'support_cases'
+    __table_args__ = (
+        # Admin lists page newest first on (created_at, id) (see keyset_paginate)
+        db.Index('ix_support_cases_created_id', 'created_at', 'id'),
+        # Dashboard counters, bulk status updates and retention filter on status
+        db.Index('ix_support_cases_status_created', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -66,6 +78,12 @@ class SupportCase(db.Model):
 
 class Inquiry(db.Model):
     __tablename__ = 'inquiries'
+    __table_args__ = (
+        # Admin lists page newest first on (created_at, id) (see keyset_paginate)
+        db.Index('ix_inquiries_created_id', 'created_at', 'id'),
+        # Dashboard counters, bulk status updates and retention filter on status
+        db.Index('ix_inquiries_status_created', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -94,6 +112,14 @@ class Inquiry(db.Model):
 
 class EventRegistration(db.Model):
     __tablename__ = 'event_registrations'
+    __table_args__ = (
+        # Admin lists page newest first on (created_at, id) (see keyset_paginate)
+        db.Index('ix_event_registrations_created_id', 'created_at', 'id'),
+        # Dashboard counters, bulk status updates and retention filter on status
+        db.Index('ix_event_registrations_status_created', 'status', 'created_at'),
+        # Event.registration_counts() groups by event over non-cancelled rows
+        db.Index('ix_event_registrations_event_status', 'event_id', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=True)
@@ -124,4 +150,12 @@ class EventRegistration(db.Model):
             'status': self.status,
             'admin_notes': self.admin_notes,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+# URL slug -> model for the customer submission tables
+SUBMISSION_MODELS = {
+    'quote-requests': QuoteRequest,
+    'support-cases': SupportCase,
+    'inquiries': Inquiry,
+    'event-registrations': EventRegistration
+}
@@ -0,0 +1,22 @@
+from src.models.user import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotency_keys'
+
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of scope + Idempotency-Key or payload
+    scope = db.Column(db.String(50), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)  # NULL while the first request is still running
+    body = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'scope': self.scope,
+            'status_code': self.status_code,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
@@ -0,0 +1,16 @@
+from src.models.user import db
+from datetime import datetime
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_versions'
+
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'name': self.name,
+            'applied_at': self.applied_at.isoformat() if self.applied_at else None
+        }
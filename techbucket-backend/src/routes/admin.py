@@ -1,16 +1,32 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, current_app, request, jsonify, session, stream_with_context
 from src.models.user import db
-from src.models.admin import Brand, Category, Product, Service, Event, Admin
-from src.models.forms import QuoteRequest, SupportCase, Inquiry, EventRegistration
+from src.models.admin import Brand, Category, Product, Service, Event, Admin, serialize_products
+from src.models.forms import QuoteRequest, SupportCase, Inquiry, EventRegistration, SUBMISSION_MODELS
+from src.models.archive import ArchivedSubmission
+from src.utils.admin_auth import current_admin, invalidate_admin, record_login, start_session
+from src.utils.cache import VERSIONED_TABLES, bump_versions, get_catalog_cache
+from src.utils.counters import read_counters, reconcile_counters
+from src.utils.db_pool import pool_status
+from src.utils.mailer import get_outbox_worker, outbox_status_counts
+from src.utils.pagination import keyset_paginate
+from src.utils.rate_limit import get_rate_limiter
+from src.utils.sql_profiler import profiler_stats
+from src.utils.startup import rss_kb
+from src.utils.product_import import ProductImporter, csv_records, ndjson_records
+from src.utils.retention import count_expired, load_policies
+from sqlalchemy.orm import joinedload
 from datetime import datetime
+import csv
 import hashlib
+import io
+import json
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
 # Authentication decorator
 def require_auth(f):
     def decorated_function(*args, **kwargs):
-        if 'admin_logged_in' not in session:
+        if current_admin() is None:
             return jsonify({'error': 'Authentication required'}), 401
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
@@ -32,13 +48,10 @@ def login():
     admin = Admin.query.filter_by(username=username, password=password_hash, is_active=True).first()
     
     if admin:
-        session['admin_logged_in'] = True
-        session['admin_id'] = admin.id
-        session['admin_username'] = admin.username
-        
-        # Update last login
-        admin.last_login = datetime.utcnow()
-        db.session.commit()
+        # Update last login (coalesced, see src/utils/admin_auth.py)
+        if record_login(admin):
+            db.session.commit()
+        start_session(admin)
         
         return jsonify({
             'success': True,
@@ -55,26 +68,17 @@ def logout():
 
 @admin_bp.route('/check-auth', methods=['GET'])
 def check_auth():
-    if 'admin_logged_in' in session:
-        admin = Admin.query.get(session['admin_id'])
-        return jsonify({'authenticated': True, 'admin': admin.to_dict() if admin else None})
+    admin = current_admin()
+    if admin is not None:
+        return jsonify({'authenticated': True, 'admin': admin})
     return jsonify({'authenticated': False})
 
 # Dashboard
 @admin_bp.route('/dashboard', methods=['GET'])
 @require_auth
 def dashboard():
-    stats = {
-        'total_products': Product.query.filter_by(is_active=True).count(),
-        'total_brands': Brand.query.filter_by(is_active=True).count(),
-        'total_categories': Category.query.filter_by(is_active=True).count(),
-        'total_services': Service.query.filter_by(is_active=True).count(),
-        'total_events': Event.query.filter_by(is_active=True).count(),
-        'pending_quotes': QuoteRequest.query.filter_by(status='pending').count(),
-        'open_support_cases': SupportCase.query.filter_by(status='open').count(),
-        'unread_inquiries': Inquiry.query.filter_by(status='unread').count(),
-        'recent_registrations': EventRegistration.query.count()
-    }
+    # Maintained incrementally on write, see src/utils/counters.py
+    stats = read_counters()
     
     # Recent activity
     recent_quotes = QuoteRequest.query.order_by(QuoteRequest.created_at.desc()).limit(5).all()
@@ -95,8 +99,9 @@ def dashboard():
 @admin_bp.route('/brands', methods=['GET'])
 @require_auth
 def get_brands():
-    brands = Brand.query.all()
-    return jsonify({'success': True, 'data': [brand.to_dict() for brand in brands]})
+    # Reference list for the product form's dropdown: small, so always returned whole
+    brands = Brand.query.order_by(Brand.created_at.desc(), Brand.id.desc()).all()
+    return jsonify({'success': True, 'data': [brand.to_dict() for brand in brands], 'next_cursor': None})
 
 @admin_bp.route('/brands', methods=['POST'])
 @require_auth
@@ -156,8 +161,9 @@ def delete_brand(brand_id):
 @admin_bp.route('/categories', methods=['GET'])
 @require_auth
 def get_categories():
-    categories = Category.query.all()
-    return jsonify({'success': True, 'data': [category.to_dict() for category in categories]})
+    # Reference list for the product form's dropdown: small, so always returned whole
+    categories = Category.query.order_by(Category.created_at.desc(), Category.id.desc()).all()
+    return jsonify({'success': True, 'data': [category.to_dict() for category in categories], 'next_cursor': None})
 
 @admin_bp.route('/categories', methods=['POST'])
 @require_auth
@@ -215,8 +221,17 @@ def delete_category(category_id):
 @admin_bp.route('/products', methods=['GET'])
 @require_auth
 def get_products():
-    products = Product.query.all()
-    return jsonify({'success': True, 'data': [product.to_dict() for product in products]})
+    query = Product.query.options(joinedload(Product.brand), joinedload(Product.category))
+    products, next_cursor = keyset_paginate(query, Product)
+
+    # ?normalized=1 sends each brand/category once instead of once per product
+    normalized = request.args.get('normalized', '').lower() in ('1', 'true')
+    data, brands, categories = serialize_products(products, normalized=normalized)
+    response = {'success': True, 'data': data, 'next_cursor': next_cursor}
+    if normalized:
+        response['brands'] = {brand_id: brand for brand_id, brand in brands.items() if brand}
+        response['categories'] = {category_id: category for category_id, category in categories.items() if category}
+    return jsonify(response)
 
 @admin_bp.route('/products', methods=['POST'])
 @require_auth
@@ -243,6 +258,31 @@ def create_product():
         db.session.rollback()
         return jsonify({'error': str(e)}), 400
 
+@admin_bp.route('/products/import', methods=['POST'])
+@require_auth
+def import_products():
+    """
+    Upsert products from a CSV or NDJSON body, read as a stream.
+
+    Columns: name, brand (or brand_id), category (or category_id), price,
+    description, specifications, image_url, featured, is_active. Products
+    are matched on brand and name; unknown brand/category names are created.
+    """
+    import_format = request.args.get('format')
+    if import_format is None:
+        import_format = 'ndjson' if 'ndjson' in (request.mimetype or '') else 'csv'
+    if import_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+
+    records = csv_records(request.stream) if import_format == 'csv' else ndjson_records(request.stream)
+    importer = ProductImporter()
+    try:
+        result = importer.run(records)
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Batches committed before the unreadable part stay; say how far the import got
+        return jsonify({'error': f'Could not read import file: {e}', **importer.summary()}), 400
+    return jsonify({'success': True, **result})
+
 @admin_bp.route('/products/<int:product_id>', methods=['PUT'])
 @require_auth
 def update_product(product_id):
@@ -285,8 +325,8 @@ def delete_product(product_id):
 @admin_bp.route('/services', methods=['GET'])
 @require_auth
 def get_services():
-    services = Service.query.all()
-    return jsonify({'success': True, 'data': [service.to_dict() for service in services]})
+    services, next_cursor = keyset_paginate(Service.query, Service)
+    return jsonify({'success': True, 'data': [service.to_dict() for service in services], 'next_cursor': next_cursor})
 
 @admin_bp.route('/services', methods=['POST'])
 @require_auth
@@ -352,8 +392,10 @@ def delete_service(service_id):
 @admin_bp.route('/events', methods=['GET'])
 @require_auth
 def get_events():
-    events = Event.query.all()
-    return jsonify({'success': True, 'data': [event.to_dict() for event in events]})
+    events, next_cursor = keyset_paginate(Event.query, Event)
+    counts = Event.registration_counts([event.id for event in events])
+    data = [event.to_dict(registration_count=counts.get(event.id, 0)) for event in events]
+    return jsonify({'success': True, 'data': data, 'next_cursor': next_cursor})
 
 @admin_bp.route('/events', methods=['POST'])
 @require_auth
@@ -427,8 +469,8 @@ def delete_event(event_id):
 @admin_bp.route('/quote-requests', methods=['GET'])
 @require_auth
 def get_quote_requests():
-    quotes = QuoteRequest.query.order_by(QuoteRequest.created_at.desc()).all()
-    return jsonify({'success': True, 'data': [quote.to_dict() for quote in quotes]})
+    quotes, next_cursor = keyset_paginate(QuoteRequest.query, QuoteRequest)
+    return jsonify({'success': True, 'data': [quote.to_dict() for quote in quotes], 'next_cursor': next_cursor})
 
 @admin_bp.route('/quote-requests/<int:quote_id>/status', methods=['PUT'])
 @require_auth
@@ -449,8 +491,8 @@ def update_quote_status(quote_id):
 @admin_bp.route('/support-cases', methods=['GET'])
 @require_auth
 def get_support_cases():
-    cases = SupportCase.query.order_by(SupportCase.created_at.desc()).all()
-    return jsonify({'success': True, 'data': [case.to_dict() for case in cases]})
+    cases, next_cursor = keyset_paginate(SupportCase.query, SupportCase)
+    return jsonify({'success': True, 'data': [case.to_dict() for case in cases], 'next_cursor': next_cursor})
 
 @admin_bp.route('/support-cases/<int:case_id>/status', methods=['PUT'])
 @require_auth
@@ -471,8 +513,8 @@ def update_support_status(case_id):
 @admin_bp.route('/inquiries', methods=['GET'])
 @require_auth
 def get_inquiries():
-    inquiries = Inquiry.query.order_by(Inquiry.created_at.desc()).all()
-    return jsonify({'success': True, 'data': [inquiry.to_dict() for inquiry in inquiries]})
+    inquiries, next_cursor = keyset_paginate(Inquiry.query, Inquiry)
+    return jsonify({'success': True, 'data': [inquiry.to_dict() for inquiry in inquiries], 'next_cursor': next_cursor})
 
 @admin_bp.route('/inquiries/<int:inquiry_id>/status', methods=['PUT'])
 @require_auth
@@ -493,8 +535,223 @@ def update_inquiry_status(inquiry_id):
 @admin_bp.route('/event-registrations', methods=['GET'])
 @require_auth
 def get_event_registrations():
-    registrations = EventRegistration.query.order_by(EventRegistration.created_at.desc()).all()
-    return jsonify({'success': True, 'data': [reg.to_dict() for reg in registrations]})
+    registrations, next_cursor = keyset_paginate(EventRegistration.query, EventRegistration)
+    return jsonify({'success': True, 'data': [reg.to_dict() for reg in registrations], 'next_cursor': next_cursor})
+
+# Bulk Status Updates
+MAX_BULK_IDS = 5000
+
+@admin_bp.route('/<submission_type>/status', methods=['PUT'])
+@require_auth
+def bulk_update_status(submission_type):
+    """
+    Set status and/or admin_notes on many submissions with one UPDATE.
+
+    Rows are selected by ``ids`` or by a ``filter`` of ``status``,
+    ``created_after`` and ``created_before``; one of the two is required so
+    an empty body can never touch the whole table.
+    """
+    model = SUBMISSION_MODELS.get(submission_type)
+    if model is None:
+        return jsonify({'error': f'Unknown submission type: {submission_type}'}), 404
+
+    data = request.get_json() or {}
+    values = {key: data[key] for key in ('status', 'admin_notes') if key in data}
+    if not values:
+        return jsonify({'error': 'status or admin_notes is required'}), 400
+
+    ids = data.get('ids')
+    filters = data.get('filter') or {}
+    if not ids and not filters:
+        return jsonify({'error': 'ids or filter is required'}), 400
+
+    criteria = []
+    try:
+        if ids:
+            if not isinstance(ids, list) or len(ids) > MAX_BULK_IDS:
+                return jsonify({'error': f'ids must be a list of at most {MAX_BULK_IDS} ids'}), 400
+            criteria.append(model.id.in_([int(id_) for id_ in ids]))
+        if 'status' in filters:
+            criteria.append(model.status == filters['status'])
+        if filters.get('created_after'):
+            criteria.append(model.created_at >= datetime.fromisoformat(filters['created_after']))
+        if filters.get('created_before'):
+            criteria.append(model.created_at < datetime.fromisoformat(filters['created_before']))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid ids or filter'}), 400
+    if not criteria:
+        return jsonify({'error': 'filter must include status, created_after or created_before'}), 400
+
+    try:
+        updated = model.query.filter(*criteria).update(values, synchronize_session=False)
+        # The UPDATE bypasses the flush hooks that maintain the status counters and cache versions
+        reconcile_counters([model])
+        if model.__tablename__ in VERSIONED_TABLES:
+            bump_versions(model.__tablename__)
+        db.session.commit()
+        return jsonify({'success': True, 'updated': updated})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+# Submission Export
+EXPORT_BATCH_SIZE = 1000
+
+def _export_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+@admin_bp.route('/<submission_type>/export', methods=['GET'])
+@require_auth
+def export_submissions(submission_type):
+    """
+    Stream a submission table as CSV or NDJSON.
+
+    Rows are read through a server-side cursor in EXPORT_BATCH_SIZE batches
+    and written out batch by batch, so memory stays flat regardless of table
+    size and the header goes out before the first batch is fetched.
+    """
+    model = SUBMISSION_MODELS.get(submission_type)
+    if model is None:
+        return jsonify({'error': f'Unknown submission type: {submission_type}'}), 404
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'format must be csv or ndjson'}), 400
+
+    columns = list(model.__table__.columns)
+    query = db.select(*columns).order_by(model.created_at, model.id)
+
+    since = request.args.get('since')
+    if since:
+        try:
+            query = query.where(model.created_at >= datetime.fromisoformat(since))
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO 8601 date or datetime'}), 400
+
+    column_names = [column.name for column in columns]
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if export_format == 'csv':
+            writer.writerow(column_names)
+            yield buffer.getvalue()
+
+        result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for rows in result.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            for row in rows:
+                values = [_export_value(value) for value in row]
+                if export_format == 'csv':
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(column_names, values))))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    filename = f"{submission_type}-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# Archived Submissions
+@admin_bp.route('/archive/<submission_type>', methods=['GET'])
+@require_auth
+def get_archived_submissions(submission_type):
+    """
+    Page through submissions the retention job has archived, newest first.
+
+    Filters: ``status``, ``source_id`` (the id the row had before it was
+    archived), ``created_after`` and ``created_before``. Slower than the live
+    lists: the row data is JSON and the table holds every year of history.
+    """
+    if submission_type not in SUBMISSION_MODELS:
+        return jsonify({'error': f'Unknown submission type: {submission_type}'}), 404
+
+    query = ArchivedSubmission.query.filter_by(submission_type=submission_type)
+    try:
+        if request.args.get('status'):
+            query = query.filter(ArchivedSubmission.status == request.args['status'])
+        if request.args.get('source_id'):
+            query = query.filter(ArchivedSubmission.source_id == int(request.args['source_id']))
+        if request.args.get('created_after'):
+            query = query.filter(ArchivedSubmission.created_at >= datetime.fromisoformat(request.args['created_after']))
+        if request.args.get('created_before'):
+            query = query.filter(ArchivedSubmission.created_at < datetime.fromisoformat(request.args['created_before']))
+    except ValueError:
+        return jsonify({'error': 'Invalid source_id, created_after or created_before'}), 400
+
+    records, next_cursor = keyset_paginate(query, ArchivedSubmission)
+    return jsonify({'success': True, 'data': [record.to_dict() for record in records], 'next_cursor': next_cursor})
+
+@admin_bp.route('/retention', methods=['GET'])
+@require_auth
+def get_retention_status():
+    """Each retention policy with how many rows it would archive now and how many it has."""
+    archived = dict(db.session.query(
+        ArchivedSubmission.submission_type, db.func.count(ArchivedSubmission.id)
+    ).group_by(ArchivedSubmission.submission_type).all())
+    try:
+        policies = load_policies(current_app.config.get('RETENTION_POLICIES'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid RETENTION_POLICIES: {e}'}), 500
+    data = {
+        submission_type: dict(policy.to_dict(), due=count_expired(policy), archived=archived.get(submission_type, 0))
+        for submission_type, policy in policies.items()
+    }
+    return jsonify({'success': True, 'data': data})
+
+# Email Outbox
+@admin_bp.route('/outbox/stats', methods=['GET'])
+@require_auth
+def outbox_stats():
+    worker = get_outbox_worker()
+    return jsonify({
+        'success': True,
+        'data': {
+            'status_counts': outbox_status_counts(),
+            'worker': worker.stats.to_dict() if worker else None
+        }
+    })
+
+# Catalog Cache
+@admin_bp.route('/cache/stats', methods=['GET'])
+@require_auth
+def cache_stats():
+    return jsonify({'success': True, 'data': get_catalog_cache().stats()})
+
+# Database Pool
+@admin_bp.route('/db/pool', methods=['GET'])
+@require_auth
+def db_pool_stats():
+    return jsonify({'success': True, 'data': pool_status(db.engine)})
+
+# SQL Profiler
+@admin_bp.route('/sql-profile', methods=['GET'])
+@require_auth
+def sql_profile():
+    return jsonify({
+        'success': True,
+        'enabled': current_app.config.get('SQL_PROFILER', False),
+        'data': profiler_stats.to_dict()
+    })
+
+# Startup Cost
+@admin_bp.route('/startup', methods=['GET'])
+@require_auth
+def startup_report():
+    report = dict(current_app.extensions.get('startup_report', {}), current_rss_kb=rss_kb())
+    return jsonify({'success': True, 'data': report})
+
+# Rate Limiting
+@admin_bp.route('/rate-limit/stats', methods=['GET'])
+@require_auth
+def rate_limit_stats():
+    return jsonify({'success': True, 'data': get_rate_limiter().stats()})
 
 # Settings Management
 @admin_bp.route('/settings/admin-credentials', methods=['PUT'])
@@ -511,7 +768,6 @@ def update_admin_credentials():
     
     if data.get('new_username'):
         admin.username = data.get('new_username')
-        session['admin_username'] = admin.username
     
     if data.get('new_password'):
         admin.password = hashlib.sha256(data.get('new_password').encode()).hexdigest()
@@ -520,7 +776,10 @@ def update_admin_credentials():
         admin.email = data.get('email')
     
     try:
+        # Other sessions for this admin fail their next revalidation, on any worker; this one carries on
+        invalidate_admin(admin.id)
         db.session.commit()
+        start_session(admin)
         return jsonify({'success': True, 'message': 'Admin credentials updated successfully'})
     except Exception as e:
         db.session.rollback()
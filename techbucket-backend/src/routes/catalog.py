@@ -0,0 +1,207 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from src.models.user import db
+from src.models.admin import Brand, Category, Product, Service, Event, serialize_products
+from src.utils.cache import cached_json, conditional_json
+from src.utils.pagination import keyset_paginate
+from src.utils.search import KINDS, SearchUnavailable, search
+
+# Public, read-only view of the catalog: active rows only, no authentication
+catalog_bp = Blueprint('catalog', __name__, url_prefix='/api/catalog')
+
+# Brands, categories, services and featured products change rarely and are
+# read on every page view, so they are served from the per-worker cache
+@catalog_bp.route('/brands', methods=['GET'])
+def get_brands():
+    def build():
+        brands = Brand.query.filter_by(is_active=True).order_by(Brand.name).all()
+        return {'success': True, 'data': [brand.to_dict() for brand in brands]}
+    return cached_json('catalog:brands', ['brands'], build)
+
+@catalog_bp.route('/categories', methods=['GET'])
+def get_categories():
+    def build():
+        categories = Category.query.filter_by(is_active=True).order_by(Category.name).all()
+        return {'success': True, 'data': [category.to_dict() for category in categories]}
+    return cached_json('catalog:categories', ['categories'], build)
+
+def _id_list(name):
+    value = request.args.get(name, '')
+    return [int(item) for item in value.split(',') if item.strip()]
+
+def _product_filters():
+    """Parse the product list filters; raises ValueError on malformed input."""
+    featured = request.args.get('featured')
+    if featured is not None:
+        featured = featured.lower() in ('1', 'true')
+    min_price = request.args.get('min_price')
+    max_price = request.args.get('max_price')
+    return {
+        'brand': _id_list('brand'),
+        'category': _id_list('category'),
+        'featured': featured,
+        'min_price': float(min_price) if min_price else None,
+        'max_price': float(max_price) if max_price else None
+    }
+
+def _price_criteria(filters):
+    criteria = [Product.is_active == True]
+    if filters['min_price'] is not None:
+        criteria.append(Product.price >= filters['min_price'])
+    if filters['max_price'] is not None:
+        criteria.append(Product.price <= filters['max_price'])
+    return criteria
+
+def product_facets(filters):
+    """
+    Brand, category and featured counts for the current filters, from one grouped query.
+
+    Only the active and price conditions are applied in SQL. Each facet is
+    then summed in Python with every filter except its own, so selecting a
+    brand still shows the counts for the other brands.
+    """
+    rows = db.session.query(
+        Product.brand_id, Brand.name, Product.category_id, Category.name, Product.featured, func.count(Product.id)
+    ).join(Brand, Product.brand_id == Brand.id).join(Category, Product.category_id == Category.id).filter(
+        *_price_criteria(filters)
+    ).group_by(Product.brand_id, Brand.name, Product.category_id, Category.name, Product.featured).all()
+
+    def matches(row, skip):
+        brand_id, _, category_id, _, featured, _ = row
+        return ((skip == 'brand' or not filters['brand'] or brand_id in filters['brand']) and
+                (skip == 'category' or not filters['category'] or category_id in filters['category']) and
+                (skip == 'featured' or filters['featured'] is None or bool(featured) == filters['featured']))
+
+    brands = {}
+    categories = {}
+    featured = {'true': 0, 'false': 0}
+    for row in rows:
+        brand_id, brand_name, category_id, category_name, is_featured, count = row
+        if matches(row, 'brand'):
+            brands.setdefault(brand_id, {'id': brand_id, 'name': brand_name, 'count': 0})['count'] += count
+        if matches(row, 'category'):
+            categories.setdefault(category_id, {'id': category_id, 'name': category_name, 'count': 0})['count'] += count
+        if matches(row, 'featured'):
+            featured['true' if is_featured else 'false'] += count
+
+    def by_count(items):
+        return sorted(items.values(), key=lambda item: (-item['count'], item['name']))
+
+    return {'brands': by_count(brands), 'categories': by_count(categories), 'featured': featured}
+
+@catalog_bp.route('/products', methods=['GET'])
+def get_products():
+    """
+    Active products filtered by ``brand``/``category`` (comma-separated ids),
+    ``featured`` and ``min_price``/``max_price``. The first page also carries
+    facet counts for the same filters.
+    """
+    try:
+        filters = _product_filters()
+    except ValueError:
+        return jsonify({'error': 'brand and category must be ids; prices must be numbers'}), 400
+
+    def build():
+        # Matches the (is_active, brand_id, category_id, price) index on products
+        query = Product.query.filter(*_price_criteria(filters))
+        if filters['brand']:
+            query = query.filter(Product.brand_id.in_(filters['brand']))
+        if filters['category']:
+            query = query.filter(Product.category_id.in_(filters['category']))
+        if filters['featured'] is not None:
+            query = query.filter(Product.featured == filters['featured'])
+        query = query.options(joinedload(Product.brand), joinedload(Product.category))
+
+        products, next_cursor = keyset_paginate(query, Product)
+        normalized = request.args.get('normalized', '').lower() in ('1', 'true')
+        data, brands, categories = serialize_products(products, normalized=normalized)
+        response = {'success': True, 'data': data, 'next_cursor': next_cursor}
+        if normalized:
+            response['brands'] = {brand_id: brand for brand_id, brand in brands.items() if brand}
+            response['categories'] = {category_id: category for category_id, category in categories.items() if category}
+        if not request.args.get('cursor'):
+            response['facets'] = product_facets(filters)
+        return response
+
+    return conditional_json(['products', 'brands', 'categories'], build)
+
+@catalog_bp.route('/products/featured', methods=['GET'])
+def get_featured_products():
+    def build():
+        products = Product.query.filter_by(is_active=True, featured=True).options(
+            joinedload(Product.brand), joinedload(Product.category)
+        ).order_by(Product.created_at.desc(), Product.id.desc()).all()
+        data, _, _ = serialize_products(products)
+        return {'success': True, 'data': data}
+    return cached_json('catalog:featured-products', ['products', 'brands', 'categories'], build)
+
+@catalog_bp.route('/products/<int:product_id>', methods=['GET'])
+def get_product(product_id):
+    product = Product.query.filter_by(id=product_id, is_active=True).first()
+    if product is None:
+        return jsonify({'error': 'Product not found'}), 404
+
+    def build():
+        return {'success': True, 'data': product.to_dict()}
+
+    return conditional_json(['products', 'brands', 'categories'], build)
+
+@catalog_bp.route('/services', methods=['GET'])
+def get_services():
+    def build():
+        services = Service.query.filter_by(is_active=True).order_by(Service.featured.desc(), Service.title).all()
+        return {'success': True, 'data': [service.to_dict() for service in services]}
+    return cached_json('catalog:services', ['services'], build)
+
+@catalog_bp.route('/events', methods=['GET'])
+def get_events():
+    def build():
+        events = Event.query.filter_by(is_active=True).order_by(Event.date, Event.time).all()
+        counts = Event.registration_counts([event.id for event in events])
+        return {'success': True, 'data': [event.to_dict(registration_count=counts.get(event.id, 0)) for event in events]}
+
+    return conditional_json(['events', 'event_registrations'], build)
+
+@catalog_bp.route('/search', methods=['GET'])
+def search_catalog():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+
+    kinds = [kind for kind in request.args.get('type', '').split(',') if kind] or list(KINDS)
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        return jsonify({'error': f"Unknown type: {', '.join(unknown)}"}), 400
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    try:
+        hits = search(query, kinds=kinds, limit=limit)
+    except SearchUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+
+    # Load each kind's matches with one query, then restore rank order
+    ids = {kind: [ref_id for hit_kind, ref_id, _ in hits if hit_kind == kind] for kind in kinds}
+    items = {}
+    if ids.get('product'):
+        products = Product.query.filter(Product.id.in_(ids['product']), Product.is_active == True).options(
+            joinedload(Product.brand), joinedload(Product.category)
+        ).all()
+        data, _, _ = serialize_products(products)
+        items.update({('product', item['id']): item for item in data})
+    if ids.get('service'):
+        services = Service.query.filter(Service.id.in_(ids['service']), Service.is_active == True).all()
+        items.update({('service', service.id): service.to_dict() for service in services})
+    if ids.get('event'):
+        events = Event.query.filter(Event.id.in_(ids['event']), Event.is_active == True).all()
+        counts = Event.registration_counts([event.id for event in events])
+        items.update({('event', event.id): event.to_dict(registration_count=counts.get(event.id, 0)) for event in events})
+
+    results = [
+        {'type': kind, 'id': ref_id, 'score': round(score, 6), 'item': items[(kind, ref_id)]}
+        for kind, ref_id, score in hits if (kind, ref_id) in items
+    ]
+    return jsonify({'success': True, 'data': results})
@@ -1,32 +1,17 @@
 from flask import Blueprint, jsonify, request
+from werkzeug.exceptions import HTTPException
 from src.models.forms import QuoteRequest, SupportCase, Inquiry, EventRegistration, db
+from src.utils.pagination import keyset_paginate
+from src.utils.mailer import queue_email
+from src.utils.rate_limit import rate_limit
+from src.utils.idempotency import idempotent
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import os
 
 forms_bp = Blueprint('forms', __name__)
 
-def send_email(to_emails, subject, body, is_html=False):
-    """
-    Send email notification
-    Note: This is a placeholder function for email sending.
-    In production, you would configure SMTP settings or use a service like SendGrid.
-    """
-    try:
-        # For now, we'll just log the email details
-        print(f"EMAIL NOTIFICATION:")
-        print(f"To: {', '.join(to_emails)}")
-        print(f"Subject: {subject}")
-        print(f"Body: {body}")
-        print("-" * 50)
-        return True
-    except Exception as e:
-        print(f"Email sending failed: {str(e)}")
-        return False
-
 @forms_bp.route('/quote-request', methods=['POST'])
+@rate_limit('quote-request')
+@idempotent('quote-request')
 def submit_quote_request():
     try:
         data = request.json
@@ -35,7 +20,7 @@ def submit_quote_request():
         quote_request = QuoteRequest(
             name=data['name'],
             contact=data['contact'],
-            office_email=data['officeEmail'],
+            email=data['officeEmail'],
             company=data.get('company', ''),
             product_name=data['productName'],
             quantity=data['quantity'],
@@ -44,7 +29,7 @@ def submit_quote_request():
         )
         
         db.session.add(quote_request)
-        db.session.commit()
+        db.session.flush()
         
         # Send email notification to sales team
         subject = f"New Quote Request - {data['productName']}"
@@ -63,7 +48,9 @@ Quote Request ID: {quote_request.id}
 Submitted: {quote_request.created_at}
         """
         
-        send_email(['sales@techbucket.com.np'], subject, body)
+        # Delivered by the outbox worker; committed atomically with the submission
+        queue_email(['sales@techbucket.com.np'], subject, body)
+        # @idempotent commits this together with the response it stores for replays
         
         return jsonify({
             'success': True,
@@ -72,12 +59,15 @@ Submitted: {quote_request.created_at}
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'message': f'Error submitting quote request: {str(e)}'
         }), 500
 
 @forms_bp.route('/support-case', methods=['POST'])
+@rate_limit('support-case')
+@idempotent('support-case')
 def submit_support_case():
     try:
         data = request.json
@@ -97,7 +87,7 @@ def submit_support_case():
         )
         
         db.session.add(support_case)
-        db.session.commit()
+        db.session.flush()
         
         # Send email notification to support team
         subject = f"New Support Case - {data['subject']} (Priority: {data['priority']})"
@@ -122,7 +112,8 @@ Status: Open
 Submitted: {support_case.created_at}
         """
         
-        send_email(['support@techbucket.com.np'], subject, body)
+        queue_email(['support@techbucket.com.np'], subject, body)
+        # @idempotent commits this together with the response it stores for replays
         
         return jsonify({
             'success': True,
@@ -131,12 +122,15 @@ Submitted: {support_case.created_at}
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'message': f'Error submitting support case: {str(e)}'
         }), 500
 
 @forms_bp.route('/inquiry', methods=['POST'])
+@rate_limit('inquiry')
+@idempotent('inquiry')
 def submit_inquiry():
     try:
         data = request.json
@@ -153,7 +147,7 @@ def submit_inquiry():
         )
         
         db.session.add(inquiry)
-        db.session.commit()
+        db.session.flush()
         
         # Send email notification to sales and info teams
         subject = f"New Inquiry - {data['subject']}"
@@ -175,7 +169,8 @@ Message:
 Submitted: {inquiry.created_at}
         """
         
-        send_email(['sales@techbucket.com.np', 'info@techbucket.com.np'], subject, body)
+        queue_email(['sales@techbucket.com.np', 'info@techbucket.com.np'], subject, body)
+        # @idempotent commits this together with the response it stores for replays
         
         return jsonify({
             'success': True,
@@ -184,12 +179,15 @@ Submitted: {inquiry.created_at}
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'message': f'Error submitting inquiry: {str(e)}'
         }), 500
 
 @forms_bp.route('/event-registration', methods=['POST'])
+@rate_limit('event-registration')
+@idempotent('event-registration')
 def submit_event_registration():
     try:
         data = request.json
@@ -208,7 +206,7 @@ def submit_event_registration():
         )
         
         db.session.add(registration)
-        db.session.commit()
+        db.session.flush()
         
         # Send email notification to info team
         subject = f"New Event Registration - {data['eventName']}"
@@ -232,7 +230,8 @@ Additional Information:
 Registered: {registration.created_at}
         """
         
-        send_email(['info@techbucket.com.np'], subject, body)
+        queue_email(['info@techbucket.com.np'], subject, body)
+        # @idempotent commits this together with the response it stores for replays
         
         return jsonify({
             'success': True,
@@ -241,41 +240,44 @@ Registered: {registration.created_at}
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({
             'success': False,
             'message': f'Error submitting event registration: {str(e)}'
         }), 500
 
 # Admin endpoints for viewing submissions
-@forms_bp.route('/admin/quote-requests', methods=['GET'])
-def get_quote_requests():
+def list_submissions(model):
+    """
+    One keyset-paginated page of ``model``, newest first.
+
+    These endpoints have always returned a bare JSON list, so the cursor for
+    the next page travels in the ``X-Next-Cursor`` header instead of the body.
+    """
     try:
-        quotes = QuoteRequest.query.order_by(QuoteRequest.created_at.desc()).all()
-        return jsonify([quote.to_dict() for quote in quotes])
+        items, next_cursor = keyset_paginate(model.query, model)
+        response = jsonify([item.to_dict() for item in items])
+    except HTTPException:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@forms_bp.route('/admin/quote-requests', methods=['GET'])
+def get_quote_requests():
+    return list_submissions(QuoteRequest)
+
 @forms_bp.route('/admin/support-cases', methods=['GET'])
 def get_support_cases():
-    try:
-        cases = SupportCase.query.order_by(SupportCase.created_at.desc()).all()
-        return jsonify([case.to_dict() for case in cases])
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return list_submissions(SupportCase)
 
 @forms_bp.route('/admin/inquiries', methods=['GET'])
 def get_inquiries():
-    try:
-        inquiries = Inquiry.query.order_by(Inquiry.created_at.desc()).all()
-        return jsonify([inquiry.to_dict() for inquiry in inquiries])
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return list_submissions(Inquiry)
 
 @forms_bp.route('/admin/event-registrations', methods=['GET'])
 def get_event_registrations():
-    try:
-        registrations = EventRegistration.query.order_by(EventRegistration.created_at.desc()).all()
-        return jsonify([registration.to_dict() for registration in registrations])
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
+    return list_submissions(EventRegistration)
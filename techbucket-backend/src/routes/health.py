@@ -0,0 +1,64 @@
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+from src.models.user import db
+from src.utils.db_pool import pool_status
+from src.utils.metrics import render
+import hmac
+import threading
+import time
+
+health_bp = Blueprint('health', __name__)
+
+# Probes arriving within this many seconds share one database check
+READINESS_CACHE_SECONDS = 1.0
+
+_readiness = {'checked_at': 0.0, 'error': None}
+_readiness_lock = threading.Lock()
+
+def _pool_exhausted(status):
+    if 'checked_out' not in status:
+        return False
+    limit = status['size'] + current_app.config.get('DB_MAX_OVERFLOW', 0)
+    return status['checked_out'] >= limit
+
+def _check_database():
+    """``None`` when a pooled connection answers ``SELECT 1``, else the error message."""
+    with _readiness_lock:
+        if time.monotonic() - _readiness['checked_at'] < READINESS_CACHE_SECONDS:
+            return _readiness['error']
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            error = None
+        except Exception as e:
+            error = str(e)
+        _readiness.update(checked_at=time.monotonic(), error=error)
+        return error
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness only: the process is up and serving requests
+    return jsonify({'status': 'ok'})
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    status = pool_status(db.engine)
+    # Waiting on a saturated pool would stall the probe for the full pool timeout
+    if _pool_exhausted(status):
+        return jsonify({'status': 'unavailable', 'error': 'Connection pool exhausted', 'pool': status}), 503
+
+    error = _check_database()
+    if error:
+        return jsonify({'status': 'unavailable', 'error': error, 'pool': status}), 503
+    return jsonify({'status': 'ready', 'pool': status})
+
+@health_bp.route('/metrics', methods=['GET'])
+def metrics():
+    # init_metrics() is skipped when disabled, so the registry would be empty or partial
+    if not current_app.config.get('METRICS_ENABLED'):
+        return jsonify({'error': 'Not found'}), 404
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Authentication required'}), 401
+    body = render(current_app.config.get('METRICS_MULTIPROC_DIR'))
+    return current_app.response_class(body, mimetype='text/plain; version=0.0.4')
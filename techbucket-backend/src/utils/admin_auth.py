@@ -0,0 +1,115 @@
+"""
+Admin session authentication without a database read per request.
+
+Login stores the admin's identity, role and a fingerprint of their
+credentials in the signed session cookie. Requests trust that until it is
+``ADMIN_REVALIDATE_INTERVAL`` seconds old, then re-check the admin against
+a small per-worker cache (falling back to one query on a miss). A changed
+password, username or deactivation changes the fingerprint and ends every
+other session for that admin at its next revalidation, on every worker:
+cache entries are keyed on the ``admins`` version in ``cache_versions``,
+which any write to an admin bumps, so no worker can keep vouching for the
+old credentials.
+
+The fingerprint is an HMAC under ``SECRET_KEY``. The session cookie is
+signed but readable, so a plain hash of the (unsalted) password hash would
+let anyone holding a cookie brute-force the password offline.
+
+``last_login`` is only written when the stored value is older than
+``ADMIN_LAST_LOGIN_RESOLUTION`` seconds, so repeated logins don't each cost
+a write.
+"""
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, session
+
+from src.models.user import db
+from src.models.admin import Admin
+from src.utils.cache import LRUCache, bump_versions, current_versions
+
+DEFAULT_REVALIDATE_INTERVAL = 60
+DEFAULT_LAST_LOGIN_RESOLUTION = 300
+ADMIN_CACHE_SIZE = 64
+
+_admin_cache = None
+
+def _revalidate_interval():
+    return current_app.config.get('ADMIN_REVALIDATE_INTERVAL', DEFAULT_REVALIDATE_INTERVAL)
+
+def get_admin_cache():
+    global _admin_cache
+    if _admin_cache is None:
+        _admin_cache = LRUCache(maxsize=ADMIN_CACHE_SIZE, ttl=_revalidate_interval())
+    return _admin_cache
+
+def credential_fingerprint(admin):
+    raw = f'{admin.id}:{admin.username}:{admin.password}:{admin.is_active}'
+    key = current_app.config['SECRET_KEY'].encode()
+    return hmac.new(key, raw.encode(), hashlib.sha256).hexdigest()[:32]
+
+def _cache_key(admin_id):
+    return (admin_id, current_versions().get('admins', 0))
+
+def _snapshot(admin):
+    return {'admin': admin.to_dict(), 'fingerprint': credential_fingerprint(admin)}
+
+def load_admin(admin_id):
+    """Cached ``{'admin', 'fingerprint'}`` for an active admin, or None."""
+    cache = get_admin_cache()
+    key = _cache_key(admin_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        admin = db.session.get(Admin, admin_id)
+        if admin is None or not admin.is_active:
+            return None
+        snapshot = _snapshot(admin)
+        cache.set(key, snapshot)
+    return snapshot
+
+def invalidate_admin(admin_id):
+    """Make every worker drop its cached copy of ``admin_id``. The caller commits."""
+    bump_versions('admins')
+    get_admin_cache().delete(_cache_key(admin_id))
+
+def start_session(admin):
+    """Record ``admin`` as the logged-in identity of this session."""
+    snapshot = _snapshot(admin)
+    get_admin_cache().set(_cache_key(admin.id), snapshot)
+    session['admin_logged_in'] = True
+    session['admin_id'] = admin.id
+    session['admin_username'] = admin.username
+    session['admin_role'] = admin.role
+    session['admin'] = snapshot['admin']
+    session['admin_fingerprint'] = snapshot['fingerprint']
+    session['admin_checked_at'] = time.time()
+
+def current_admin():
+    """
+    The session's admin as a dict, or None when not logged in or the
+    session no longer matches the admin's current credentials.
+    """
+    if 'admin_logged_in' not in session:
+        return None
+    now = time.time()
+    if now - session.get('admin_checked_at', 0) < _revalidate_interval():
+        return session['admin']
+
+    snapshot = load_admin(session.get('admin_id'))
+    if snapshot is None or snapshot['fingerprint'] != session.get('admin_fingerprint'):
+        session.clear()
+        return None
+    session['admin'] = snapshot['admin']
+    session['admin_checked_at'] = now
+    return session['admin']
+
+def record_login(admin):
+    """Set ``last_login`` unless it was already set recently. The caller commits."""
+    resolution = current_app.config.get('ADMIN_LAST_LOGIN_RESOLUTION', DEFAULT_LAST_LOGIN_RESOLUTION)
+    now = datetime.utcnow()
+    if admin.last_login is None or now - admin.last_login >= timedelta(seconds=resolution):
+        admin.last_login = now
+        return True
+    return False
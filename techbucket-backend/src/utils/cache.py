@@ -0,0 +1,209 @@
+"""
+Per-worker cache for rarely changing catalog reads.
+
+Entries are keyed on the version numbers of the tables they were built from.
+Those versions live in the ``cache_versions`` table and a session
+``after_flush`` hook bumps them in the same transaction as any insert,
+update or delete of a versioned table. Every request reads the (tiny)
+versions table once, so a write made through any worker on any node makes
+every other worker miss on its next request. Superseded entries are never
+looked up again and simply age out of the LRU.
+
+Writes that bypass the ORM unit of work must call ``bump_versions()``.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from itertools import chain
+
+from flask import current_app, g, has_app_context, jsonify, make_response, request
+from sqlalchemy import event
+
+from src.models.user import db
+from src.models.cache import CacheVersion
+from src.utils.http_cache import finish_conditional, is_not_modified
+
+# admins is versioned for the admin session cache (see src/utils/admin_auth.py);
+# event_registrations for the seat counts in the public event list
+VERSIONED_TABLES = ('brands', 'categories', 'products', 'services', 'events', 'admins', 'event_registrations')
+
+class LRUCache:
+    """Thread-safe LRU mapping whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+            }
+
+_catalog_cache = None
+
+def get_catalog_cache():
+    global _catalog_cache
+    if _catalog_cache is None:
+        _catalog_cache = LRUCache(
+            maxsize=current_app.config.get('CATALOG_CACHE_SIZE', 256),
+            ttl=current_app.config.get('CATALOG_CACHE_TTL', 300)
+        )
+    return _catalog_cache
+
+def ensure_cache_versions():
+    """Create any missing version rows. The caller commits."""
+    existing = {row.table_name for row in CacheVersion.query.all()}
+    for table_name in VERSIONED_TABLES:
+        if table_name not in existing:
+            db.session.add(CacheVersion(table_name=table_name, version=0))
+
+def _load_versions():
+    rows = db.session.query(CacheVersion.table_name, CacheVersion.version, CacheVersion.updated_at).all()
+    g._cache_versions = {row.table_name: row.version for row in rows}
+    g._cache_changed_at = {row.table_name: row.updated_at for row in rows}
+
+def current_versions():
+    """Table versions, read at most once per request."""
+    if g.get('_cache_versions') is None:
+        _load_versions()
+    return g._cache_versions
+
+def last_changed(tables):
+    """
+    When any of ``tables`` was last written, from their version rows.
+
+    Unlike the newest ``updated_at`` of the rows themselves this never moves
+    backwards: deleting the newest row bumps the version too. Returns None
+    during the second of the last write, since a second write within the same
+    second would carry the same (whole-second) Last-Modified.
+    """
+    if g.get('_cache_versions') is None:
+        _load_versions()
+    timestamps = [g._cache_changed_at[table_name] for table_name in tables if g._cache_changed_at.get(table_name)]
+    if not timestamps:
+        return None
+    newest = max(timestamps).replace(microsecond=0)
+    if newest >= datetime.utcnow().replace(microsecond=0):
+        return None
+    return newest.replace(tzinfo=timezone.utc)
+
+def bump_versions(*table_names, connection=None):
+    """Invalidate cached data for ``table_names`` in the current transaction."""
+    table = CacheVersion.__table__
+    connection = connection if connection is not None else db.session.connection()
+    for table_name in sorted(set(table_names)):
+        connection.execute(
+            table.update()
+            .where(table.c.table_name == table_name)
+            .values(version=table.c.version + 1, updated_at=datetime.utcnow())
+        )
+    if has_app_context():
+        g.pop('_cache_versions', None)
+        g.pop('_cache_changed_at', None)
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_changed_tables(session, flush_context):
+    changed = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is None or table.name not in VERSIONED_TABLES:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        changed.add(table.name)
+    if changed:
+        bump_versions(*changed, connection=session.connection())
+
+def cached_json(key, tables, build):
+    """
+    Serve ``build()`` as JSON from the per-worker cache, honouring If-None-Match.
+
+    ``build`` returns the payload and only runs on a miss; the payload is
+    serialized once and the bytes and their ETag are cached.
+    """
+    versions = current_versions()
+    cache_key = (key, tuple(versions.get(table_name, 0) for table_name in tables))
+    cache = get_catalog_cache()
+
+    entry = cache.get(cache_key)
+    if entry is None:
+        body = json.dumps(build(), separators=(',', ':'), sort_keys=True).encode()
+        entry = (body, hashlib.sha256(body).hexdigest()[:32])
+        cache.set(cache_key, entry)
+
+    body, etag = entry
+    last_modified = last_changed(tables)
+    if is_not_modified(etag, last_modified):
+        response = make_response('', 304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+    return finish_conditional(response, etag, last_modified)
+
+def conditional_json(tables, build):
+    """
+    Return ``build()`` as JSON with ETag/Last-Modified validators, or a 304.
+
+    For responses too varied to cache (filtered, paginated lists): the
+    validators come from the request path and the versions of ``tables``,
+    every table the body depends on, so no rows are read to answer a
+    conditional request. ``build`` only runs when the client's copy is stale.
+    """
+    versions = current_versions()
+    digest = hashlib.sha256(request.full_path.encode())
+    for table_name in tables:
+        digest.update(f"|{table_name}:{versions.get(table_name, 0)}".encode())
+    etag = digest.hexdigest()[:32]
+    last_modified = last_changed(tables)
+
+    response = make_response('', 304) if is_not_modified(etag, last_modified) else jsonify(build())
+    return finish_conditional(response, etag, last_modified)
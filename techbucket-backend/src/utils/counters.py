@@ -0,0 +1,140 @@
+"""
+Incrementally maintained dashboard counters.
+
+Every counter is a count of rows in one table, optionally restricted to a
+single column value. Instead of running COUNT(*) on each dashboard load, a
+session ``after_flush`` hook works out how each flush changed those counts
+(inserts, deletes and changes of the filtered column) and applies the
+difference with ``value = value + delta`` in the same transaction.
+
+Writes that bypass the ORM unit of work (bulk ``query.update()``,
+``executemany`` inserts, raw SQL) are not seen by the hook; callers doing
+those should run ``reconcile_counters()`` for the affected tables, and the
+periodic reconcile job corrects any remaining drift.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import event, func, inspect, select
+
+from src.models.user import db
+from src.models.admin import Brand, Category, Product, Service, Event
+from src.models.forms import QuoteRequest, SupportCase, Inquiry, EventRegistration
+from src.models.dashboard import DashboardCounter
+
+# counter name -> (model, filtered attribute, value that is counted)
+COUNTERS = {
+    'total_products': (Product, 'is_active', True),
+    'total_brands': (Brand, 'is_active', True),
+    'total_categories': (Category, 'is_active', True),
+    'total_services': (Service, 'is_active', True),
+    'total_events': (Event, 'is_active', True),
+    'pending_quotes': (QuoteRequest, 'status', 'pending'),
+    'open_support_cases': (SupportCase, 'status', 'open'),
+    'unread_inquiries': (Inquiry, 'status', 'unread'),
+    'recent_registrations': (EventRegistration, None, None)
+}
+
+def _counters_for(obj):
+    return [(name, attr, value) for name, (model, attr, value) in COUNTERS.items() if isinstance(obj, model)]
+
+def _column_default(obj, attr):
+    default = obj.__table__.columns[attr].default
+    return default.arg if default is not None and default.is_scalar else None
+
+def _current_value(obj, attr):
+    value = getattr(obj, attr)
+    return _column_default(obj, attr) if value is None else value
+
+def _previous_value(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return _current_value(obj, attr)
+
+@event.listens_for(db.session, 'after_flush')
+def _apply_counter_deltas(session, flush_context):
+    deltas = Counter()
+
+    for obj in session.new:
+        for name, attr, value in _counters_for(obj):
+            if attr is None or _current_value(obj, attr) == value:
+                deltas[name] += 1
+
+    for obj in session.deleted:
+        for name, attr, value in _counters_for(obj):
+            if attr is None or _previous_value(obj, attr) == value:
+                deltas[name] -= 1
+
+    for obj in session.dirty:
+        for name, attr, value in _counters_for(obj):
+            if attr is None:
+                continue
+            was_counted = _previous_value(obj, attr) == value
+            is_counted = _current_value(obj, attr) == value
+            if was_counted != is_counted:
+                deltas[name] += 1 if is_counted else -1
+
+    table = DashboardCounter.__table__
+    connection = session.connection()
+    # Fixed update order keeps concurrent flushes from deadlocking on counter rows
+    for name in sorted(deltas):
+        if deltas[name]:
+            connection.execute(
+                table.update()
+                .where(table.c.name == name)
+                .values(value=table.c.value + deltas[name])
+            )
+
+def reconcile_counters(models=None):
+    """
+    Recompute counters from the source tables and store them.
+
+    ``models`` limits the work to counters over those tables. The caller owns
+    the transaction and must commit.
+    """
+    names = [name for name, (model, _, _) in COUNTERS.items() if models is None or model in models]
+    if not names:
+        return {}
+
+    counts = []
+    for name in names:
+        model, attr, value = COUNTERS[name]
+        query = select(func.count()).select_from(model)
+        if attr is not None:
+            query = query.where(getattr(model, attr) == value)
+        counts.append(query.scalar_subquery().label(name))
+
+    row = db.session.execute(select(*counts)).one()
+    now = datetime.utcnow()
+    values = dict(zip(names, row))
+    for name, value in values.items():
+        db.session.merge(DashboardCounter(name=name, value=value, reconciled_at=now))
+    return values
+
+def read_counters():
+    """All dashboard counters from a single read, reconciling first if any are missing."""
+    values = {counter.name: counter.value for counter in DashboardCounter.query.all()}
+    if any(name not in values for name in COUNTERS):
+        values.update(reconcile_counters())
+        db.session.commit()
+    return {name: values[name] for name in COUNTERS}
+
+def start_reconcile_thread(app, interval):
+    """Reconcile every ``interval`` seconds in a daemon thread of this process."""
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    reconcile_counters()
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Counter reconcile failed: {e}")
+
+    thread = threading.Thread(target=run, name='counter-reconcile', daemon=True)
+    thread.start()
+    return thread
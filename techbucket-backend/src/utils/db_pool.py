@@ -0,0 +1,138 @@
+"""
+Database connection pool configuration and telemetry.
+
+``engine_options()`` turns the DB_POOL_* settings into
+``SQLALCHEMY_ENGINE_OPTIONS``. Pre-ping tests a connection on checkout, so
+one dropped by the server or a NAT during an idle period is replaced
+transparently instead of failing the request; recycle retires connections
+before the server's idle timeout gets to them.
+
+The pool class is a QueuePool that times every checkout (including the
+connect when a new connection has to be opened), so a saturated pool shows
+up as growing wait times and timeouts before it shows up as errors. The
+timings go to the ``db_pool_*`` series in /metrics too, and
+``register_pool_metrics()`` adds the pool's size, in-use and overflow
+connections there as gauges.
+
+``dispose_engines_after_fork()`` makes a forked worker drop the pool it
+inherited from the parent, so no two processes ever share a connection.
+"""
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from src.models.user import db
+from src.utils.metrics import registry
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def record(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += 1 if timed_out else 0
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        registry.observe('db_pool_checkout_wait_seconds', (), seconds)
+        registry.inc('db_pool_checkouts_total', ())
+        if timed_out:
+            registry.inc('db_pool_checkout_timeouts_total', ())
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+                'wait_seconds_avg': round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else None
+            }
+
+pool_stats = PoolStats()
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return connection
+
+def engine_options(database_uri, pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800, pool_pre_ping=True):
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for ``database_uri``."""
+    options = {'pool_pre_ping': pool_pre_ping, 'pool_recycle': pool_recycle}
+    # In-memory SQLite needs its single shared connection; everything else gets the timed pool
+    if not (database_uri.startswith('sqlite') and ':memory:' in database_uri):
+        options.update({
+            'poolclass': TimedQueuePool,
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': pool_timeout
+        })
+    return options
+
+def pool_status(engine):
+    """In-use/idle/overflow gauges for the engine's pool plus checkout timings."""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(0, pool.overflow())
+        })
+    status.update(pool_stats.snapshot())
+    return status
+
+def register_pool_metrics(app):
+    """Report the pool gauges of ``app``'s default engine in /metrics."""
+    with app.app_context():
+        engine_ref = weakref.ref(db.engine)
+
+    def collect():
+        engine = engine_ref()
+        if engine is None:
+            return
+        status = pool_status(engine)
+        if 'checked_out' in status:
+            registry.set_gauge('db_pool_size', (), status['size'])
+            registry.set_gauge('db_pool_checked_out', (), status['checked_out'])
+            registry.set_gauge('db_pool_overflow', (), status['overflow'])
+    registry.add_collector('db_pool', collect)
+
+_fork_apps = []
+
+def _dispose_after_fork():
+    for ref in _fork_apps:
+        app = ref()
+        if app is None:
+            continue
+        with app.app_context():
+            for engine in db.engines.values():
+                # close=False leaves the parent's sockets alone; the child just forgets them
+                engine.dispose(close=False)
+    # Fresh lock too: another thread may have held it at the moment of the fork
+    pool_stats.__init__()
+
+def dispose_engines_after_fork(app):
+    """Give every forked child of this process fresh pools for ``app``'s engines."""
+    if not _fork_apps and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_dispose_after_fork)
+    _fork_apps.append(weakref.ref(app))
@@ -0,0 +1,28 @@
+"""
+Conditional GET support for read-only JSON endpoints.
+
+A response is validated from the ``cache_versions`` rows of the tables it
+was built from (see ``cached_json`` and ``conditional_json`` in
+src/utils/cache.py), so a request carrying a matching ``If-None-Match`` or
+``If-Modified-Since`` gets a 304 without the rows being loaded or serialized.
+"""
+from flask import current_app, request
+
+DEFAULT_MAX_AGE = 60
+DEFAULT_STALE_WHILE_REVALIDATE = 300
+
+def is_not_modified(etag, last_modified):
+    """Whether the request's validators match; If-None-Match takes precedence."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return bool(since and last_modified and last_modified <= since)
+
+def finish_conditional(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config.get('CATALOG_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+    response.cache_control.stale_while_revalidate = DEFAULT_STALE_WHILE_REVALIDATE
+    return response
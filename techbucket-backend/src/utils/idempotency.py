@@ -0,0 +1,182 @@
+"""
+Collapse repeated form submissions into the first one.
+
+A request is identified by its ``Idempotency-Key`` header when the client
+sends one, otherwise by a hash of its normalized JSON payload. The first
+request reserves the key (committed before the view runs, so a concurrent
+double-click sees it) and stores its response on success; repeats within
+the key's lifetime get that stored response back, marked with an
+``Idempotent-Replayed`` header, without running the insert or queueing the
+email again.
+
+Decorated views flush but don't commit: on success the decorator stores
+the response and commits it in the same transaction as the view's writes,
+so a submission can never be committed while its key still looks
+unfinished.
+
+* A repeat that arrives while the first request is still running gets 409.
+* Reusing an ``Idempotency-Key`` with a different payload gets 422.
+* Failed requests release their key so the client can retry.
+* A reservation left behind by a crashed worker is taken over after
+  ``IN_PROGRESS_TIMEOUT``. If the original request turns out to be alive
+  after all, its commit finds the reservation gone and rolls back.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request
+from sqlalchemy.exc import IntegrityError
+
+from src.models.user import db
+from src.models.idempotency import IdempotencyKey
+
+DEFAULT_KEY_TTL = 24 * 3600
+DEFAULT_CONTENT_WINDOW = 600
+IN_PROGRESS_TIMEOUT = timedelta(seconds=60)
+MAX_KEY_LENGTH = 255
+PRUNE_EVERY = 500
+
+_reservations = 0
+
+def _normalize(value):
+    if isinstance(value, str):
+        return ' '.join(value.split())
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+def request_hash():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        raw = request.get_data()
+    else:
+        raw = json.dumps(_normalize(payload), sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.sha256(raw).hexdigest()
+
+def _digest(*parts):
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+def _prune(now):
+    IdempotencyKey.query.filter(IdempotencyKey.expires_at < now).delete(synchronize_session=False)
+
+def reserve(key, scope, payload_hash, ttl):
+    """
+    Claim ``key`` for this request. Returns ``('new', reserved_at)`` when the
+    caller should run the view, else ``('replay' | 'in_progress' | 'mismatch', record)``.
+    """
+    global _reservations
+    now = datetime.utcnow()
+    record = db.session.get(IdempotencyKey, key)
+    if record is not None and (
+        record.expires_at <= now
+        or (record.status_code is None and record.created_at < now - IN_PROGRESS_TIMEOUT)
+    ):
+        db.session.delete(record)
+        db.session.flush()
+        record = None
+
+    if record is None:
+        db.session.add(IdempotencyKey(
+            key=key, scope=scope, request_hash=payload_hash,
+            created_at=now, expires_at=now + timedelta(seconds=ttl)
+        ))
+        _reservations += 1
+        if _reservations % PRUNE_EVERY == 0:
+            _prune(now)
+        try:
+            db.session.commit()
+            return 'new', now
+        except IntegrityError:
+            # A concurrent request reserved it first
+            db.session.rollback()
+            record = db.session.get(IdempotencyKey, key)
+            if record is None:
+                return 'in_progress', None
+
+    if record.request_hash != payload_hash:
+        return 'mismatch', record
+    if record.status_code is None:
+        return 'in_progress', record
+    return 'replay', record
+
+def complete(key, reserved_at, response):
+    """
+    Store ``response`` and commit it with the view's writes. Returns False,
+    having rolled everything back, if the reservation was taken over meanwhile.
+    """
+    stored = IdempotencyKey.query.filter_by(key=key, created_at=reserved_at, status_code=None).update(
+        {'status_code': response.status_code, 'body': response.get_data(as_text=True)},
+        synchronize_session=False
+    )
+    if not stored:
+        db.session.rollback()
+        return False
+    db.session.commit()
+    return True
+
+def release(key, reserved_at):
+    db.session.rollback()
+    # Only our own reservation: after a takeover the key belongs to another request
+    IdempotencyKey.query.filter_by(key=key, created_at=reserved_at).delete(synchronize_session=False)
+    db.session.commit()
+
+def _in_progress():
+    response = jsonify({'success': False, 'message': 'This request is already being processed'})
+    response.status_code = 409
+    response.headers['Retry-After'] = '1'
+    return response
+
+def _run_view(f, key, reserved_at, args, kwargs):
+    try:
+        response = make_response(f(*args, **kwargs))
+    except Exception:
+        release(key, reserved_at)
+        raise
+    if not 200 <= response.status_code < 300:
+        release(key, reserved_at)
+        return response
+
+    try:
+        stored = complete(key, reserved_at, response)
+    except Exception as e:
+        release(key, reserved_at)
+        return jsonify({'success': False, 'message': f'Error saving submission: {str(e)}'}), 500
+    # Lost to a takeover: the request that took the key over owns the submission
+    return response if stored else _in_progress()
+
+def idempotent(scope):
+    """Replay the stored response for repeats of a successful request to ``scope``."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            config = current_app.config
+            payload_hash = request_hash()
+            client_key = request.headers.get('Idempotency-Key', '').strip()
+            if len(client_key) > MAX_KEY_LENGTH:
+                return jsonify({'success': False, 'message': 'Idempotency-Key is too long'}), 400
+            if client_key:
+                key = _digest(scope, 'key', client_key)
+                ttl = config.get('IDEMPOTENCY_KEY_TTL', DEFAULT_KEY_TTL)
+            else:
+                key = _digest(scope, 'content', payload_hash)
+                ttl = config.get('IDEMPOTENCY_CONTENT_WINDOW', DEFAULT_CONTENT_WINDOW)
+
+            state, record = reserve(key, scope, payload_hash, ttl)
+            if state == 'new':
+                return _run_view(f, key, record, args, kwargs)
+            if state == 'replay':
+                response = current_app.response_class(record.body, status=record.status_code, mimetype='application/json')
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+            if state == 'in_progress':
+                return _in_progress()
+            return jsonify({
+                'success': False,
+                'message': 'Idempotency-Key was already used with a different request'
+            }), 422
+        return decorated_function
+    return decorator
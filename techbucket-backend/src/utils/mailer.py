@@ -0,0 +1,298 @@
+"""
+Transactional email outbox.
+
+Request handlers never talk to SMTP. ``queue_email()`` adds an ``EmailOutbox``
+row to the current session, so the message is committed (or rolled back)
+together with the submission that caused it. ``OutboxWorker`` drains the
+table from a small thread pool, reusing SMTP connections across messages,
+retrying transient failures with exponential backoff and moving messages
+that keep failing (or fail permanently) to the ``dead`` state.
+
+The worker runs either as its own process (``flask outbox run``) or as
+daemon threads inside the web process when MAIL_OUTBOX_THREADS is set.
+Point MAIL_SERVER/MAIL_PORT at a local stand-in such as
+``python -m aiosmtpd -n -l localhost:8025`` with MAIL_USE_TLS=false and no
+MAIL_USERNAME to exercise it without a real mailbox; tests/test_mailer.py
+runs the worker against an in-process aiosmtpd server the same way.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_
+
+from src.models.user import db
+from src.models.outbox import EmailOutbox
+
+DEFAULT_MAX_ATTEMPTS = 8
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+# A message stuck in 'sending' longer than this belonged to a worker that died
+SENDING_LEASE = timedelta(minutes=10)
+
+def queue_email(to_emails, subject, body):
+    """Add a message to the outbox in the caller's transaction; the caller commits."""
+    recipients = to_emails if isinstance(to_emails, list) else [to_emails]
+    message = EmailOutbox(recipients=recipients, subject=subject, body=body)
+    db.session.add(message)
+    return message
+
+def build_message(sender, recipients, subject, body):
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg['From'] = sender
+    msg['To'] = ', '.join(recipients)
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg.as_string()
+
+class SMTPConnectionPool:
+    """
+    Keeps logged-in SMTP connections open between messages.
+
+    A connection idle for longer than ``max_idle`` seconds is checked with
+    NOOP before reuse, and one that fails during a send is discarded rather
+    than returned to the pool.
+    """
+
+    def __init__(self, host, port, use_tls=True, username=None, password=None,
+                 size=4, timeout=30, max_idle=60):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.opened = 0
+
+    @classmethod
+    def from_config(cls, config, size=4):
+        return cls(
+            config['MAIL_SERVER'],
+            config['MAIL_PORT'],
+            use_tls=config.get('MAIL_USE_TLS', True),
+            username=config.get('MAIL_USERNAME'),
+            password=config.get('MAIL_PASSWORD'),
+            size=size
+        )
+
+    def _connect(self):
+        import smtplib
+
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.opened += 1
+        return server
+
+    def _checkout(self):
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.max_idle:
+                return server
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except Exception:
+                pass
+            self._close(server)
+
+    def _close(self, server):
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        server = self._checkout()
+        try:
+            yield server
+        except Exception:
+            self._close(server)
+            raise
+        try:
+            self._idle.put_nowait((server, time.monotonic()))
+        except queue.Full:
+            self._close(server)
+
+    def close(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+class DeliveryStats:
+    """Thread-safe delivery counters plus a one-minute throughput window."""
+
+    def __init__(self, window=60):
+        self.window = window
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            if outcome == 'sent':
+                now = time.monotonic()
+                self._recent.append(now)
+                while self._recent and self._recent[0] < now - self.window:
+                    self._recent.popleft()
+
+    def to_dict(self):
+        with self._lock:
+            cutoff = time.monotonic() - self.window
+            recent = sum(1 for stamp in self._recent if stamp >= cutoff)
+            return {
+                'sent': self.sent,
+                'retried': self.retried,
+                'dead': self.dead,
+                'sent_per_second': round(recent / self.window, 3)
+            }
+
+def _is_permanent(error):
+    import smtplib
+
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(error, 'smtp_code', None)
+    return isinstance(code, int) and 500 <= code < 600
+
+def backoff_delay(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS))
+
+def claim_batch(limit):
+    """
+    Atomically mark up to ``limit`` due messages as 'sending' and return their ids.
+
+    Each row is claimed with a conditional UPDATE, so several worker threads
+    or processes can poll the same table without sending a message twice.
+    """
+    table = EmailOutbox.__table__
+    now = datetime.utcnow()
+    claimable = or_(
+        and_(table.c.status == 'pending', table.c.next_attempt_at <= now),
+        and_(table.c.status == 'sending', table.c.locked_at < now - SENDING_LEASE)
+    )
+    candidates = db.session.execute(
+        db.select(table.c.id).where(claimable).order_by(table.c.next_attempt_at).limit(limit)
+    ).scalars().all()
+
+    claimed = []
+    for message_id in candidates:
+        result = db.session.execute(
+            table.update()
+            .where(and_(table.c.id == message_id, claimable))
+            .values(status='sending', locked_at=now)
+        )
+        if result.rowcount == 1:
+            claimed.append(message_id)
+    db.session.commit()
+    return claimed
+
+def outbox_status_counts():
+    rows = db.session.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all()
+    return dict(rows)
+
+class OutboxWorker:
+    def __init__(self, app, threads=2, batch_size=20, poll_interval=2.0, max_attempts=None):
+        self.app = app
+        self.threads = threads
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts or app.config.get('MAIL_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        self.pool = SMTPConnectionPool.from_config(app.config, size=threads)
+        self.stats = DeliveryStats()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def deliver(self, message):
+        sender = self.app.config['MAIL_DEFAULT_SENDER']
+        text = build_message(sender, message.recipients, message.subject, message.body)
+        message.attempts = (message.attempts or 0) + 1
+        try:
+            with self.pool.connection() as server:
+                server.sendmail(sender, message.recipients, text)
+        except Exception as e:
+            message.last_error = str(e)[:1000]
+            message.locked_at = None
+            if _is_permanent(e) or message.attempts >= self.max_attempts:
+                message.status = 'dead'
+                self.stats.record('dead')
+            else:
+                message.status = 'pending'
+                message.next_attempt_at = datetime.utcnow() + backoff_delay(message.attempts)
+                self.stats.record('retried')
+            return False
+
+        message.status = 'sent'
+        message.sent_at = datetime.utcnow()
+        message.locked_at = None
+        message.last_error = None
+        self.stats.record('sent')
+        return True
+
+    def run_once(self):
+        """Claim and deliver one batch. Returns the number of messages processed."""
+        with self.app.app_context():
+            message_ids = claim_batch(self.batch_size)
+            for message_id in message_ids:
+                message = db.session.get(EmailOutbox, message_id)
+                if message is None:
+                    continue
+                self.deliver(message)
+                db.session.commit()
+            return len(message_ids)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                print(f"OUTBOX WORKER ERROR: {str(e)}")
+                processed = 0
+            if not processed:
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._run, name=f'outbox-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.pool.close()
+
+_worker = None
+
+def start_outbox_worker(app, threads):
+    """Run the outbox worker as daemon threads of this process."""
+    global _worker
+    if _worker is None:
+        _worker = OutboxWorker(app, threads=threads).start()
+    return _worker
+
+def get_outbox_worker():
+    return _worker
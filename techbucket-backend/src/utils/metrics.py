@@ -0,0 +1,318 @@
+"""
+Request and SQL metrics in the Prometheus text exposition format.
+
+Request hooks record, per blueprint and endpoint: a latency histogram,
+request counts by status, response bytes, and the number and total time of
+SQL statements the request ran. In-flight requests are a gauge. The
+connection pool adds its checkout count, timeouts and a checkout-wait
+histogram, and registers a collector that reports its size, in-use and
+overflow connections as gauges (see src/utils/db_pool.py). Recording is a
+few dict updates under one lock, so it costs microseconds.
+
+Each process keeps its own registry. With ``METRICS_MULTIPROC_DIR`` set
+(one directory shared by all gunicorn workers), every process also writes
+a snapshot of its registry to ``metrics_<pid>.json`` there about once a
+second from a background thread, and ``/metrics`` merges all snapshots:
+
+* counters and histograms are summed over every file, including those of
+  workers that have exited, so totals don't drop when a worker restarts;
+* gauges are summed over live processes only.
+
+Clear the directory when the server starts (gunicorn.conf.py does).
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# A healthy checkout takes microseconds; the top buckets reach the default pool timeout
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+FLUSH_INTERVAL = 1.0
+
+HELP = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint and method.'),
+    'http_requests_in_flight': ('gauge', 'HTTP requests currently being served.'),
+    'http_response_size_bytes_total': ('counter', 'Response body bytes sent by endpoint.'),
+    'db_queries_total': ('counter', 'SQL statements executed while serving requests, by endpoint.'),
+    'db_query_duration_seconds_total': ('counter', 'Time spent in SQL statements while serving requests, by endpoint.'),
+    'db_pool_checkouts_total': ('counter', 'Connections checked out of the pool.'),
+    'db_pool_checkout_timeouts_total': ('counter', 'Checkouts that gave up after the pool timeout.'),
+    'db_pool_checkout_wait_seconds': ('histogram', 'Time spent waiting for a pooled connection, including connecting.'),
+    'db_pool_size': ('gauge', 'Connections the pool keeps open.'),
+    'db_pool_checked_out': ('gauge', 'Pooled connections currently in use.'),
+    'db_pool_overflow': ('gauge', 'Connections open beyond the pool size.')
+}
+
+# [statement count, seconds] for the request being served, if any
+_request_sql = ContextVar('request_sql', default=None)
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}    # (name, labels) -> value
+        self.gauges = {}      # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.collectors = {}  # name -> callable that sets gauges just before a snapshot
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_gauge(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def set_gauge(self, name, labels, value):
+        with self._lock:
+            self.gauges[(name, labels)] = value
+
+    def observe(self, name, labels, seconds):
+        buckets = BUCKETS[name]
+        index = bisect.bisect_left(buckets, seconds)
+        key = (name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(buckets) + 2)
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    def add_collector(self, name, collect):
+        """Run ``collect()`` before every snapshot; a later collector of the same name replaces it."""
+        with self._lock:
+            self.collectors[name] = collect
+
+    def snapshot(self):
+        with self._lock:
+            collectors = list(self.collectors.values())
+        for collect in collectors:
+            try:
+                collect()
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                'histograms': [[name, list(labels), list(values)] for (name, labels), values in self.histograms.items()]
+            }
+
+registry = Registry()
+
+# Request hooks
+def _before_request():
+    g._metrics_start = time.perf_counter()
+    _request_sql.set([0, 0.0])
+    registry.add_gauge('http_requests_in_flight', (), 1)
+
+def _after_request(response):
+    g._metrics_status = response.status_code
+    g._metrics_bytes = response.content_length or 0
+    return response
+
+def _teardown_request(exc):
+    start = g.pop('_metrics_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    registry.add_gauge('http_requests_in_flight', (), -1)
+
+    endpoint = request.endpoint or 'none'
+    blueprint = request.blueprint or ''
+    method = request.method
+    status = g.pop('_metrics_status', 500)
+    registry.observe('http_request_duration_seconds', (blueprint, endpoint, method), elapsed)
+    registry.inc('http_requests_total', (blueprint, endpoint, method, str(status)))
+    registry.inc('http_response_size_bytes_total', (blueprint, endpoint), g.pop('_metrics_bytes', 0))
+
+    sql = _request_sql.get()
+    _request_sql.set(None)
+    if sql and sql[0]:
+        registry.inc('db_queries_total', (blueprint, endpoint), sql[0])
+        registry.inc('db_query_duration_seconds_total', (blueprint, endpoint), sql[1])
+
+# SQL hooks, installed once for every engine
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_sql.get() is not None:
+        conn.info.setdefault('_metrics_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    sql = _request_sql.get()
+    starts = conn.info.get('_metrics_query_start')
+    if sql is not None and starts:
+        sql[0] += 1
+        sql[1] += time.perf_counter() - starts.pop()
+
+_sql_hooks_installed = False
+
+def _install_sql_hooks():
+    global _sql_hooks_installed
+    if not _sql_hooks_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _sql_hooks_installed = True
+
+# Multiprocess snapshots
+class SnapshotWriter:
+    def __init__(self, directory, interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def path(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    def flush(self):
+        pid = os.getpid()
+        tmp = f'{self.path(pid)}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(dict(registry.snapshot(), pid=pid), f, separators=(',', ':'))
+        os.replace(tmp, self.path(pid))
+
+    def ensure_started(self):
+        # Runs per request; threads don't survive a fork, so each process starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, daemon=True, name='metrics-flush').start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Metrics flush failed: {e}")
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _merge(snapshots):
+    counters, gauges, histograms = {}, {}, {}
+    for snapshot in snapshots:
+        alive = snapshot['live']
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(labels))
+            counters[key] = counters.get(key, 0) + value
+        if alive:
+            for name, labels, value in snapshot['gauges']:
+                key = (name, tuple(labels))
+                gauges[key] = gauges.get(key, 0) + value
+        for name, labels, values in snapshot['histograms']:
+            merged = histograms.setdefault((name, tuple(labels)), [0] * len(values))
+            for index, value in enumerate(values):
+                merged[index] += value
+    return counters, gauges, histograms
+
+def collect(directory=None):
+    """Merged ``(counters, gauges, histograms)`` for this process or, in multiprocess mode, all of them."""
+    own = dict(registry.snapshot(), live=True)
+    if not directory:
+        return _merge([own])
+
+    snapshots = [own]
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snapshot.get('pid') == os.getpid():
+            continue
+        snapshot['live'] = _pid_alive(snapshot['pid'])
+        snapshots.append(snapshot)
+    return _merge(snapshots)
+
+# Exposition
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+LABEL_NAMES = {
+    'http_requests_total': ('blueprint', 'endpoint', 'method', 'status'),
+    'http_requests_in_flight': (),
+    'http_response_size_bytes_total': ('blueprint', 'endpoint'),
+    'db_queries_total': ('blueprint', 'endpoint'),
+    'db_query_duration_seconds_total': ('blueprint', 'endpoint'),
+    'db_pool_checkouts_total': (),
+    'db_pool_checkout_timeouts_total': (),
+    'db_pool_size': (),
+    'db_pool_checked_out': (),
+    'db_pool_overflow': ()
+}
+HISTOGRAM_LABELS = {
+    'http_request_duration_seconds': ('blueprint', 'endpoint', 'method'),
+    'db_pool_checkout_wait_seconds': ()
+}
+BUCKETS = {
+    'http_request_duration_seconds': LATENCY_BUCKETS,
+    'db_pool_checkout_wait_seconds': POOL_WAIT_BUCKETS
+}
+
+def render(directory=None):
+    counters, gauges, histograms = collect(directory)
+    samples = {}
+    for (name, labels), value in list(counters.items()) + list(gauges.items()):
+        samples.setdefault(name, []).append(f'{name}{_labels(LABEL_NAMES[name], labels)} {value}')
+
+    lines = []
+    for name, (kind, help_text) in HELP.items():
+        if kind == 'histogram':
+            series = sorted((labels, values) for (series_name, labels), values in histograms.items() if series_name == name)
+            if not series:
+                continue
+            label_names = HISTOGRAM_LABELS[name]
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for labels, values in series:
+                cumulative = 0
+                for bound, count in zip(BUCKETS[name] + ('+Inf',), values[:-1]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else repr(float(bound))
+                    bucket_labels = _labels(label_names, labels, f'le="{le}"')
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{name}_sum{_labels(label_names, labels)} {values[-1]}')
+                lines.append(f'{name}_count{_labels(label_names, labels)} {cumulative}')
+        elif name in samples:
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            lines += sorted(samples[name])
+    return '\n'.join(lines) + '\n'
+
+def init_metrics(app):
+    """Install the request and SQL hooks on ``app``."""
+    _install_sql_hooks()
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    directory = app.config.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        writer = SnapshotWriter(directory)
+        app.extensions['metrics_writer'] = writer
+        app.before_request(writer.ensure_started)
@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import request, jsonify, abort, make_response
+from sqlalchemy import and_, or_
+
+from src.models.user import db
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(created_at, row_id):
+    payload = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return (datetime.fromisoformat(created_at) if created_at is not None else None), int(row_id)
+
+def _bad_request(message):
+    abort(make_response(jsonify({'error': message}), 400))
+
+def get_page_size():
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        _bad_request('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def _after(model, created_at, row_id):
+    """
+    Rows after (created_at, row_id) in ``created_at DESC, id DESC`` order.
+
+    The ORDER BY leaves NULLs where the dialect puts them, so the
+    (created_at, id) indexes still supply the order: first on PostgreSQL
+    (NULL sorts high), last elsewhere. Rows with a NULL created_at (legacy
+    or raw SQL inserts) are still paged through, by id.
+    """
+    nulls_first = db.engine.dialect.name == 'postgresql'
+    if created_at is None:
+        criteria = and_(model.created_at.is_(None), model.id < row_id)
+        return or_(criteria, model.created_at.is_not(None)) if nulls_first else criteria
+    criteria = or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < row_id)
+    )
+    return criteria if nulls_first else or_(criteria, model.created_at.is_(None))
+
+def keyset_paginate(query, model):
+    """
+    Return one page of ``query`` ordered newest first on (created_at, id).
+
+    The position is carried in an opaque ``cursor`` query argument instead of
+    an offset, so every page is a single index range scan no matter how deep
+    the client has paged. Returns ``(items, next_cursor)``; ``next_cursor`` is
+    None on the last page.
+    """
+    limit = get_page_size()
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            created_at, row_id = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            _bad_request('Invalid cursor')
+        query = query.filter(_after(model, created_at, row_id))
+
+    items = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return items, next_cursor
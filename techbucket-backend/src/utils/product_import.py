@@ -0,0 +1,216 @@
+"""
+Bulk product import from CSV or NDJSON.
+
+Records are consumed from a stream and processed in batches. Brand and
+category names resolve through in-memory maps (missing ones are created),
+products are matched on (brand, name) and each batch is written with one
+executemany INSERT and one bulk UPDATE by primary key. A batch that fails
+in the database is rolled back and replayed row by row so one bad row only
+costs itself. Every batch is committed on its own, so a long import never
+holds one huge transaction.
+
+Errors are reported by line of the uploaded file. If the file itself can't
+be read partway through (bad encoding, broken CSV quoting) the import
+stops; the batches committed before that stay, and ``summary()`` says how
+many rows they held and the last line they covered.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import func, insert, update
+
+from src.models.user import db
+from src.models.admin import Brand, Category, Product
+from src.utils.cache import bump_versions
+from src.utils.counters import reconcile_counters
+from src.utils.search import index_ids
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+
+def csv_records(stream):
+    """``(line number, record)`` pairs; a record with quoted newlines is numbered by its last line."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for record in reader:
+        yield reader.line_num, record
+
+def ndjson_records(stream):
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, ValueError(f'Invalid JSON: {e}')
+
+def _bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+def _specifications(value):
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, dict)):
+        return value
+    value = str(value).strip()
+    if value[:1] in ('[', '{'):
+        return json.loads(value)
+    return [item.strip() for item in value.split(';') if item.strip()]
+
+class ProductImporter:
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.brands = {brand.name.lower(): brand.id for brand in Brand.query.all()}
+        self.categories = {category.name.lower(): category.id for category in Category.query.all()}
+        self.created = 0
+        self.updated = 0
+        self.committed_through_line = None
+        self.errors = []
+        self.error_count = 0
+
+    def _error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def _resolve(self, record, key, names, model):
+        if record.get(f'{key}_id') not in (None, ''):
+            return int(record[f'{key}_id'])
+        name = (record.get(key) or '').strip()
+        if not name:
+            raise ValueError(f'{key} or {key}_id is required')
+        if name.lower() not in names:
+            # Committed straight away so later rollbacks can't orphan the cached id
+            obj = model(name=name)
+            db.session.add(obj)
+            db.session.commit()
+            names[name.lower()] = obj.id
+        return names[name.lower()]
+
+    def _values(self, record):
+        name = (record.get('name') or '').strip()
+        if not name:
+            raise ValueError('name is required')
+        price = record.get('price')
+        return {
+            'name': name,
+            'description': record.get('description') or None,
+            'specifications': _specifications(record.get('specifications')),
+            'image_url': record.get('image_url') or None,
+            'price': float(price) if price not in (None, '') else None,
+            'brand_id': self._resolve(record, 'brand', self.brands, Brand),
+            'category_id': self._resolve(record, 'category', self.categories, Category),
+            'featured': _bool(record.get('featured'), False),
+            'is_active': _bool(record.get('is_active'), True)
+        }
+
+    def _existing_ids(self, keys):
+        """Map (brand_id, lower name) -> product id for the keys in one batch."""
+        brand_ids = {brand_id for brand_id, _ in keys}
+        names = {name for _, name in keys}
+        rows = db.session.query(Product.id, Product.brand_id, Product.name).filter(
+            Product.brand_id.in_(brand_ids), func.lower(Product.name).in_(names)
+        ).all()
+        found = {(brand_id, name.lower()): product_id for product_id, brand_id, name in rows}
+        return {key: product_id for key, product_id in found.items() if key in keys}
+
+    def _write(self, rows):
+        """Insert or update ``rows`` (dicts keyed by (brand_id, lower name)); returns touched ids."""
+        now = datetime.utcnow()
+        existing = self._existing_ids(set(rows))
+        inserts = []
+        updates = []
+        for key, values in rows.items():
+            values = dict(values, updated_at=now)
+            if key in existing:
+                updates.append(dict(values, id=existing[key]))
+            else:
+                inserts.append(dict(values, created_at=now))
+
+        ids = []
+        if inserts:
+            ids.extend(db.session.scalars(insert(Product).returning(Product.id), inserts).all())
+        if updates:
+            db.session.execute(update(Product), updates)
+            ids.extend(row['id'] for row in updates)
+
+        bump_versions('products')
+        index_ids('product', ids)
+        return len(inserts), len(updates)
+
+    def _flush_batch(self, batch):
+        if not batch:
+            return
+        # Later rows for the same product win, as they would if sent one by one
+        rows = {}
+        row_numbers = {}
+        for row_number, values in batch:
+            key = (values['brand_id'], values['name'].lower())
+            rows[key] = values
+            row_numbers[key] = row_number
+
+        try:
+            created, updated = self._write(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            created = updated = 0
+            for key, values in rows.items():
+                try:
+                    row_created, row_updated = self._write({key: values})
+                    db.session.commit()
+                    created += row_created
+                    updated += row_updated
+                except Exception as e:
+                    db.session.rollback()
+                    self._error(row_numbers[key], str(getattr(e, 'orig', e)))
+        self.created += created
+        self.updated += updated
+        self.committed_through_line = batch[-1][0]
+
+    def run(self, records):
+        """
+        Import ``(line number, record)`` pairs and return ``summary()``.
+
+        Errors reading ``records`` propagate, but only after the counters
+        have been reconciled for the batches already committed.
+        """
+        try:
+            batch = []
+            for line_number, record in records:
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    batch.append((line_number, self._values(record)))
+                except Exception as e:
+                    db.session.rollback()
+                    self._error(line_number, str(e))
+                    continue
+                if len(batch) >= self.batch_size:
+                    self._flush_batch(batch)
+                    batch = []
+            self._flush_batch(batch)
+        finally:
+            # The executemany writes bypass the counter flush hook
+            db.session.rollback()
+            reconcile_counters([Product, Brand, Category])
+            db.session.commit()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'committed': self.created + self.updated,
+            'committed_through_line': self.committed_through_line,
+            'error_count': self.error_count,
+            'errors': self.errors
+        }
@@ -0,0 +1,216 @@
+"""
+Token-bucket rate limiting for the public form endpoints.
+
+Every (endpoint, client IP) pair gets a bucket of ``burst`` tokens that
+refills at ``rate`` tokens per second; a request takes one token or is
+rejected with 429 and a ``Retry-After`` telling the client when the next
+token is due. The check runs before the view, so a rejected request never
+opens a database session. The client IP is ``request.remote_addr`` after
+ProxyFix, which trusts ``PROXY_FIX_X_FOR`` X-Forwarded-For hops (default 1,
+the deployed reverse proxy).
+
+Buckets live in a pluggable backend:
+
+* ``memory`` (default): an LRU dict of at most ``MEMORY_MAX_KEYS`` buckets
+  per worker process. Free, but each worker enforces its own budget.
+* ``database``: a ``rate_limit_buckets`` table reached through its own small
+  engine, shared by every worker that points at it. ``RATE_LIMIT_DATABASE_URL``
+  defaults to the application database; a local SQLite file works as a
+  stand-in that shares budgets between the workers of one host. The table
+  is created by ``flask db upgrade`` (migration 8, and in the separate
+  database when one is configured), never by a worker.
+
+If the backend fails (including SQLite staying locked past its busy
+timeout) the error is logged and counted in the stats, and the request is
+let through so the limiter can never take the forms down with it; set
+``RATE_LIMIT_FAIL_OPEN=false`` to reject instead.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from sqlalchemy import Column, Float, MetaData, String, Table, create_engine, delete, event, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+DEFAULT_RATE_PER_MINUTE = 10
+DEFAULT_BURST = 5
+MEMORY_MAX_KEYS = 10000
+DATABASE_PRUNE_EVERY = 1000
+DATABASE_IDLE_SECONDS = 3600
+
+metadata = MetaData()
+rate_limit_buckets = Table(
+    'rate_limit_buckets', metadata,
+    Column('key', String(200), primary_key=True),
+    Column('tokens', Float, nullable=False),
+    Column('updated_at', Float, nullable=False)
+)
+
+def _refill(tokens, updated_at, now, rate, burst):
+    return min(burst, tokens + max(0.0, now - updated_at) * rate)
+
+def _take(tokens, rate):
+    """``(allowed, tokens left, seconds until the next token)``"""
+    if tokens >= 1:
+        return True, tokens - 1, 0
+    return False, tokens, math.ceil((1 - tokens) / rate)
+
+class MemoryBackend:
+    def __init__(self, max_keys=MEMORY_MAX_KEYS):
+        self.max_keys = max_keys
+        # Least recently used first, so eviction never has to scan
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            allowed, tokens, retry_after = _take(_refill(tokens, updated_at, now, rate, burst), rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # One new key evicts one old one; under a flood of new clients the
+            # oldest buckets are dropped even if they haven't refilled yet
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed, retry_after
+
+def _begin_immediate(engine):
+    """
+    Make every transaction on the SQLite ``engine`` take the write lock up
+    front. pysqlite otherwise defers BEGIN until the first write, so two
+    processes can both read a bucket before either updates it; FOR UPDATE
+    is a no-op on SQLite.
+    """
+    @event.listens_for(engine, 'connect')
+    def _disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _emit_begin(connection):
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+class DatabaseBackend:
+    def __init__(self, url):
+        options = {'connect_args': {'timeout': 5}} if url.startswith('sqlite') else {'pool_size': 2, 'max_overflow': 2}
+        self.engine = create_engine(url, **options)
+        if url.startswith('sqlite'):
+            _begin_immediate(self.engine)
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def _read_bucket(self, connection, key):
+        table = rate_limit_buckets
+        return connection.execute(
+            select(table.c.tokens, table.c.updated_at).where(table.c.key == key).with_for_update()
+        ).first()
+
+    def take(self, key, rate, burst, now):
+        table = rate_limit_buckets
+        with self.engine.begin() as connection:
+            row = self._read_bucket(connection, key)
+            if row is None:
+                try:
+                    with connection.begin_nested():
+                        connection.execute(insert(table).values(key=key, tokens=burst, updated_at=now))
+                except IntegrityError:
+                    # Another worker created the bucket first (PostgreSQL can't lock a missing row)
+                    pass
+                row = self._read_bucket(connection, key)
+
+            allowed, tokens, retry_after = _take(_refill(row.tokens, row.updated_at, now, rate, burst), rate)
+            connection.execute(update(table).where(table.c.key == key).values(tokens=tokens, updated_at=now))
+
+            with self._lock:
+                self._calls += 1
+                prune = self._calls % DATABASE_PRUNE_EVERY == 0
+            if prune:
+                connection.execute(delete(table).where(table.c.updated_at < now - DATABASE_IDLE_SECONDS))
+        return allowed, retry_after
+
+def create_bucket_table(url):
+    """Create ``rate_limit_buckets`` in a ``RATE_LIMIT_DATABASE_URL`` other than the app's own."""
+    engine = create_engine(url)
+    try:
+        rate_limit_buckets.create(engine, checkfirst=True)
+    finally:
+        engine.dispose()
+
+class RateLimiter:
+    def __init__(self, backend, rate_per_minute=DEFAULT_RATE_PER_MINUTE, burst=DEFAULT_BURST, fail_open=True):
+        self.backend = backend
+        self.fail_open = fail_open
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.allowed = {}
+        self.rejected = {}
+        self.backend_errors = 0
+        self._lock = threading.Lock()
+
+    def check(self, scope, client):
+        """``(allowed, retry_after)`` for one request from ``client`` to ``scope``."""
+        try:
+            allowed, retry_after = self.backend.take(f'{scope}:{client}', self.rate, self.burst, time.time())
+        except Exception as e:
+            print(f"Rate limit backend error ({'allowing' if self.fail_open else 'rejecting'} request): "
+                  f"{type(e).__name__}: {e}")
+            with self._lock:
+                self.backend_errors += 1
+            allowed, retry_after = self.fail_open, 0 if self.fail_open else 1
+
+        counts = self.allowed if allowed else self.rejected
+        with self._lock:
+            counts[scope] = counts.get(scope, 0) + 1
+        return allowed, retry_after
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': type(self.backend).__name__,
+                'rate_per_minute': round(self.rate * 60, 3),
+                'burst': self.burst,
+                'fail_open': self.fail_open,
+                'allowed': dict(self.allowed),
+                'rejected': dict(self.rejected),
+                'rejected_total': sum(self.rejected.values()),
+                'backend_errors': self.backend_errors
+            }
+
+_rate_limiter = None
+
+def get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        config = current_app.config
+        if config.get('RATE_LIMIT_BACKEND', 'memory') == 'database':
+            backend = DatabaseBackend(config.get('RATE_LIMIT_DATABASE_URL') or config['SQLALCHEMY_DATABASE_URI'])
+        else:
+            backend = MemoryBackend()
+        _rate_limiter = RateLimiter(
+            backend,
+            rate_per_minute=config.get('RATE_LIMIT_FORMS_PER_MINUTE', DEFAULT_RATE_PER_MINUTE),
+            burst=config.get('RATE_LIMIT_FORMS_BURST', DEFAULT_BURST),
+            fail_open=config.get('RATE_LIMIT_FAIL_OPEN', True)
+        )
+    return _rate_limiter
+
+def rate_limit(scope):
+    """Reject requests from one IP to ``scope`` beyond the configured budget with 429."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if current_app.config.get('RATE_LIMIT_ENABLED', True):
+                allowed, retry_after = get_rate_limiter().check(scope, request.remote_addr or 'unknown')
+                if not allowed:
+                    response = jsonify({
+                        'success': False,
+                        'message': 'Too many requests, please try again later'
+                    })
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(max(1, retry_after))
+                    return response
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
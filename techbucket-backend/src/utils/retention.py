@@ -0,0 +1,160 @@
+"""
+Retention policies for the form submission tables.
+
+Submissions past their policy move into ``archived_submissions`` (every
+column kept as JSON) so the hot tables, and the indexes the admin lists
+scan, stay small. A policy selects rows older than ``days`` and, optionally,
+only ``statuses`` or everything but ``exclude_statuses``; registrations are
+also held until their event has taken place. ``RETENTION_POLICIES`` (JSON,
+keyed by submission type) overrides the defaults, and ``null`` disables a
+type:
+
+    RETENTION_POLICIES='{"support-cases": {"days": 365, "statuses": ["closed"]}}'
+
+Rows move in chunks of ``chunk_size``: each chunk is selected, deleted and
+archived in its own short transaction, so nothing holds locks for longer
+than one chunk takes. On PostgreSQL the selection skips rows another
+transaction has locked (an admin editing a case keeps it for the next run).
+Run it from cron or a one-off job:
+
+    flask retention run
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, insert, or_, select
+
+from src.models.user import db
+from src.models.admin import Event
+from src.models.archive import ArchivedSubmission
+from src.models.forms import SUBMISSION_MODELS, EventRegistration
+from src.utils.cache import VERSIONED_TABLES, bump_versions
+from src.utils.counters import reconcile_counters
+
+CHUNK_SIZE = 1000
+
+DEFAULT_POLICIES = {
+    'quote-requests': {'days': 365, 'exclude_statuses': ['pending']},
+    'support-cases': {'days': 365, 'statuses': ['resolved', 'closed']},
+    'inquiries': {'days': 365, 'exclude_statuses': ['unread']},
+    'event-registrations': {'days': 365}
+}
+
+class RetentionPolicy:
+    def __init__(self, submission_type, days, statuses=None, exclude_statuses=None):
+        if submission_type not in SUBMISSION_MODELS:
+            raise ValueError(f'Unknown submission type: {submission_type}')
+        if int(days) < 1:
+            raise ValueError(f'{submission_type}: days must be at least 1')
+        self.submission_type = submission_type
+        self.model = SUBMISSION_MODELS[submission_type]
+        self.days = int(days)
+        self.statuses = statuses
+        self.exclude_statuses = exclude_statuses
+
+    def criteria(self, now=None):
+        model = self.model
+        cutoff = (now or datetime.utcnow()) - timedelta(days=self.days)
+        criteria = [model.created_at < cutoff]
+        if self.statuses:
+            criteria.append(model.status.in_(self.statuses))
+        if self.exclude_statuses:
+            criteria.append(or_(model.status.is_(None), model.status.not_in(self.exclude_statuses)))
+        if model is EventRegistration:
+            # Archiving a registration drops it from its event's seat count
+            past_events = select(Event.id).where(Event.date < (now or datetime.utcnow()).date())
+            criteria.append(or_(model.event_id.is_(None), model.event_id.in_(past_events)))
+        return criteria
+
+    def to_dict(self):
+        return {
+            'days': self.days,
+            'statuses': self.statuses,
+            'exclude_statuses': self.exclude_statuses
+        }
+
+def load_policies(overrides=None):
+    """Policies by submission type: the defaults with ``overrides`` applied."""
+    policies = {}
+    for submission_type, settings in dict(DEFAULT_POLICIES, **(overrides or {})).items():
+        if settings is not None:
+            policies[submission_type] = RetentionPolicy(submission_type, **settings)
+    return policies
+
+def _json_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+def count_expired(policy, now=None):
+    model = policy.model
+    return db.session.scalar(select(func.count(model.id)).where(*policy.criteria(now)))
+
+def archive_chunk(policy, chunk_size=CHUNK_SIZE, now=None):
+    """
+    Move up to ``chunk_size`` expired rows into the archive and commit.
+    Returns the number moved, which is 0 only when no expired rows are left.
+    """
+    model = policy.model
+    table = model.__table__
+    try:
+        rows = []
+        while not rows:
+            ids = db.session.scalars(
+                select(model.id).where(*policy.criteria(now)).order_by(model.id).limit(chunk_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not ids:
+                db.session.rollback()
+                return 0
+
+            # Delete first and archive what the DELETE returns: it re-applies the
+            # policy, so a row that changed since the (unlocked, on SQLite) select
+            # stays put, and the copy is exactly the row that was removed. If
+            # every selected row changed, select again; they no longer match
+            rows = db.session.execute(
+                delete(table).where(table.c.id.in_(ids), *policy.criteria(now)).returning(*table.c)
+            ).mappings().all()
+
+        archived_at = datetime.utcnow()
+        db.session.execute(insert(ArchivedSubmission), [{
+            'submission_type': policy.submission_type,
+            'source_id': row['id'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'archived_at': archived_at,
+            'data': {key: _json_value(value) for key, value in row.items()}
+        } for row in rows])
+        db.session.commit()
+        return len(rows)
+    except Exception:
+        db.session.rollback()
+        raise
+
+def archive_expired(policy, chunk_size=CHUNK_SIZE, pause=0.0, limit=None, now=None, echo=None):
+    """
+    Archive every row ``policy`` selects, chunk by chunk, sleeping ``pause``
+    seconds between chunks to leave the database room for live traffic.
+    Stops after ``limit`` rows if given. Returns the number archived.
+    """
+    now = now or datetime.utcnow()
+    total = 0
+    try:
+        while limit is None or total < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - total)
+            moved = archive_chunk(policy, size, now)
+            total += moved
+            # A short chunk can just mean rows changed under it; only an empty one means done
+            if not moved:
+                break
+            if echo:
+                echo(f"{policy.submission_type}: archived {total}")
+            if pause:
+                time.sleep(pause)
+    finally:
+        if total:
+            # The DELETEs bypass the flush hooks that maintain counters and cache
+            # versions; the chunks already committed need this even if a later one failed
+            reconcile_counters([policy.model])
+            if policy.model.__tablename__ in VERSIONED_TABLES:
+                bump_versions(policy.model.__tablename__)
+            db.session.commit()
+    return total
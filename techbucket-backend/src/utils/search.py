@@ -0,0 +1,208 @@
+"""
+Full-text search over active products, services and events.
+
+All three are indexed into one ``catalog_search`` table holding a title and
+a body per document:
+
+* SQLite: an FTS5 virtual table ranked with bm25(). The rowid encodes
+  ``(kind, id)`` so a document is replaced or removed by rowid instead of
+  scanning the index.
+* PostgreSQL: a regular table with a weighted ``tsvector`` column behind a
+  GIN index, ranked with ts_rank().
+
+Both use prefix matching on every search term. A session ``after_flush``
+hook keeps the index in step with ORM writes in the same transaction; bulk
+writes that bypass the ORM should call ``index_ids()`` or ``reindex()``
+afterwards.
+"""
+import re
+
+from sqlalchemy import event, inspect, select, text
+
+from src.models.user import db
+from src.models.admin import Product, Service, Event
+
+SEARCH_TABLE = 'catalog_search'
+
+# kind -> (model, rowid tag)
+KINDS = {
+    'product': (Product, 1),
+    'service': (Service, 2),
+    'event': (Event, 3)
+}
+KIND_BY_MODEL = {model: kind for kind, (model, _) in KINDS.items()}
+ROWID_KINDS = 4
+
+class SearchUnavailable(Exception):
+    pass
+
+def _flatten(value):
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        return ' '.join(f'{key} {_flatten(item)}' for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_flatten(item) for item in value)
+    return str(value)
+
+def document_for(obj):
+    """``(title, body)`` indexed for a product, service or event."""
+    if isinstance(obj, Product):
+        return obj.name, f'{_flatten(obj.description)} {_flatten(obj.specifications)}'
+    if isinstance(obj, Service):
+        return obj.title, f'{_flatten(obj.description)} {_flatten(obj.features)}'
+    return obj.title, _flatten(obj.description)
+
+def _rowid(kind, ref_id):
+    return ref_id * ROWID_KINDS + KINDS[kind][1]
+
+def is_supported(dialect_name):
+    return dialect_name in ('sqlite', 'postgresql')
+
+def create_search_index(connection):
+    """Create the search table for this database if it does not exist."""
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "kind UNINDEXED, ref_id UNINDEXED, title, body, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+    elif dialect == 'postgresql':
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "kind VARCHAR(20) NOT NULL, ref_id INTEGER NOT NULL, title TEXT, body TEXT, "
+            "document TSVECTOR NOT NULL, PRIMARY KEY (kind, ref_id))"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)"
+        ))
+
+def search_index_missing():
+    """True when this database supports search but the index has not been built yet."""
+    connection = db.session.connection()
+    return is_supported(connection.dialect.name) and not inspect(connection).has_table(SEARCH_TABLE)
+
+def _delete_many(connection, kind, ref_ids):
+    if not ref_ids:
+        return
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :rowid"),
+                           [{'rowid': _rowid(kind, ref_id)} for ref_id in ref_ids])
+    else:
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE kind = :kind AND ref_id = :ref_id"),
+                           [{'kind': kind, 'ref_id': ref_id} for ref_id in ref_ids])
+
+def _upsert_many(connection, kind, objs):
+    if not objs:
+        return
+    params = []
+    for obj in objs:
+        title, body = document_for(obj)
+        params.append({'rowid': _rowid(kind, obj.id), 'kind': kind, 'ref_id': obj.id, 'title': title or '', 'body': body})
+
+    if connection.dialect.name == 'sqlite':
+        _delete_many(connection, kind, [obj.id for obj in objs])
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, kind, ref_id, title, body) "
+            "VALUES (:rowid, :kind, :ref_id, :title, :body)"
+        ), params)
+    else:
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (kind, ref_id, title, body, document) "
+            "VALUES (:kind, :ref_id, :title, :body, "
+            "setweight(to_tsvector('simple', :title), 'A') || setweight(to_tsvector('simple', :body), 'B')) "
+            "ON CONFLICT (kind, ref_id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body, "
+            "document = EXCLUDED.document"
+        ), params)
+
+def index_objects(connection, kind, objs):
+    """Index active ``objs`` of one kind and drop inactive ones, a statement per batch."""
+    _delete_many(connection, kind, [obj.id for obj in objs if obj.is_active is False])
+    _upsert_many(connection, kind, [obj for obj in objs if obj.is_active is not False])
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    connection = session.connection()
+    if not is_supported(connection.dialect.name):
+        return
+
+    deleted = {kind: [] for kind in KINDS}
+    changed = {kind: [] for kind in KINDS}
+    for obj in session.deleted:
+        if type(obj) in KIND_BY_MODEL:
+            deleted[KIND_BY_MODEL[type(obj)]].append(obj.id)
+    for obj in session.new:
+        if type(obj) in KIND_BY_MODEL:
+            changed[KIND_BY_MODEL[type(obj)]].append(obj)
+    for obj in session.dirty:
+        if type(obj) in KIND_BY_MODEL and session.is_modified(obj):
+            changed[KIND_BY_MODEL[type(obj)]].append(obj)
+
+    for kind in KINDS:
+        _delete_many(connection, kind, deleted[kind])
+        index_objects(connection, kind, changed[kind])
+
+def index_ids(kind, ids):
+    """Re-index specific rows after a bulk write the flush hook did not see."""
+    connection = db.session.connection()
+    if not ids or not is_supported(connection.dialect.name):
+        return
+    model = KINDS[kind][0]
+    index_objects(connection, kind, model.query.filter(model.id.in_(ids)).all())
+
+def reindex(kinds=None, batch_size=1000):
+    """Rebuild the index for ``kinds`` (default all). The caller commits."""
+    connection = db.session.connection()
+    if not is_supported(connection.dialect.name):
+        raise SearchUnavailable(f'Full-text search is not supported on {connection.dialect.name}')
+    create_search_index(connection)
+
+    total = 0
+    for kind in kinds or KINDS:
+        model = KINDS[kind][0]
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE kind = :kind"), {'kind': kind})
+        rows = db.session.scalars(
+            select(model).where(model.is_active.is_(True)).execution_options(yield_per=batch_size)
+        )
+        for objs in rows.partitions():
+            _upsert_many(connection, kind, objs)
+            total += len(objs)
+    return total
+
+def _terms(query):
+    return re.findall(r'\w+', query.lower())[:10]
+
+def search(query, kinds=None, limit=20):
+    """
+    Ranked ``[(kind, id, score)]`` for ``query``; every term is prefix-matched
+    and all terms must match.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    kinds = list(kinds or KINDS)
+    connection = db.session.connection()
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        placeholders = ', '.join(f':kind{index}' for index in range(len(kinds)))
+        params = {f'kind{index}': kind for index, kind in enumerate(kinds)}
+        params.update({'match': match, 'limit': limit})
+        rows = connection.execute(text(
+            f"SELECT kind, ref_id, bm25({SEARCH_TABLE}, 0, 0, 10.0, 1.0) AS score FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH :match AND kind IN ({placeholders}) ORDER BY score LIMIT :limit"
+        ), params).all()
+        # bm25() is lower-is-better; flip it so higher means more relevant
+        return [(kind, int(ref_id), -score) for kind, ref_id, score in rows]
+
+    if dialect == 'postgresql':
+        rows = connection.execute(text(
+            f"SELECT kind, ref_id, ts_rank(document, query) AS score "
+            f"FROM {SEARCH_TABLE}, to_tsquery('simple', :tsquery) AS query "
+            "WHERE document @@ query AND kind = ANY(:kinds) ORDER BY score DESC LIMIT :limit"
+        ), {'tsquery': ' & '.join(f'{term}:*' for term in terms), 'kinds': kinds, 'limit': limit}).all()
+        return [(kind, ref_id, score) for kind, ref_id, score in rows]
+
+    raise SearchUnavailable(f'Full-text search is not supported on {dialect}')
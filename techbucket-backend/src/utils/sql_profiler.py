@@ -0,0 +1,195 @@
+"""
+Opt-in per-request SQL profiler.
+
+With ``SQL_PROFILER`` on, every request records the statements it runs on
+any engine: count, total time, and how often each statement *shape* (the
+SQL with parameters and IN-lists collapsed) repeats. A SELECT shape that
+repeats ``SQL_N_PLUS_ONE_THRESHOLD`` times in one request is reported as a
+suspected N+1 (typically a lazy relationship touched in a loop), and any
+statement slower than ``SQL_SLOW_QUERY_MS`` is logged with its endpoint.
+Responses carry ``X-Query-Count`` and a ``Server-Timing`` db entry, and the
+per-endpoint totals are kept for ``/api/admin/sql-profile``.
+
+``count_queries()`` and ``assert_max_queries()`` use the same recording
+without the request hooks, for tests and benchmarks:
+
+    assert_max_queries(client, '/api/admin/products', 3)
+"""
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_SLOW_QUERY_MS = 100
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+MAX_LOGGED_STATEMENT = 500
+
+_PARAMS = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?")
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_LIST = re.compile(r'(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+# Profiles currently recording in this context (a request, count_queries() blocks)
+_active = ContextVar('sql_profiles', default=())
+
+def statement_shape(statement):
+    """``statement`` with parameters, IN-lists and multi-row VALUES collapsed."""
+    shape = _PARAMS.sub('?', statement)
+    shape = _IN_LIST.sub('(?)', shape)
+    shape = _VALUES_LIST.sub(r'\1', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+class QueryProfile:
+    def __init__(self, label, slow_query_ms=None):
+        self.label = label
+        self.slow_query_ms = slow_query_ms
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = {}  # shape -> [count, seconds]
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        shape = statement_shape(statement)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            self.shapes[shape] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+        if self.slow_query_ms is not None and seconds * 1000 >= self.slow_query_ms:
+            print(f"Slow query ({seconds * 1000:.1f}ms) on {self.label}: {statement[:MAX_LOGGED_STATEMENT]}")
+
+    def repeated(self, threshold=2):
+        """``[(shape, count, seconds)]`` run at least ``threshold`` times, most frequent first."""
+        rows = [(shape, count, seconds) for shape, (count, seconds) in self.shapes.items() if count >= threshold]
+        return sorted(rows, key=lambda row: (-row[1], -row[2]))
+
+    def n_plus_one(self, threshold=DEFAULT_N_PLUS_ONE_THRESHOLD):
+        return [row for row in self.repeated(threshold) if row[0].upper().startswith('SELECT')]
+
+    def report(self, limit=10):
+        lines = [f"{self.label}: {self.count} queries, {self.seconds * 1000:.1f}ms"]
+        shapes = sorted(self.shapes.items(), key=lambda item: (-item[1][0], -item[1][1]))
+        for shape, (count, seconds) in shapes[:limit]:
+            lines.append(f"  {count:>4} x {seconds * 1000:8.1f}ms  {shape[:200]}")
+        return '\n'.join(lines)
+
+class ProfilerStats:
+    """Per-endpoint totals across the requests this worker has profiled."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+
+    def add(self, profile, suspects):
+        with self._lock:
+            stats = self.endpoints.setdefault(profile.label, {
+                'requests': 0, 'queries': 0, 'db_ms': 0.0, 'max_queries': 0,
+                'n_plus_one_requests': 0, 'last_n_plus_one': None
+            })
+            stats['requests'] += 1
+            stats['queries'] += profile.count
+            stats['db_ms'] += profile.seconds * 1000
+            stats['max_queries'] = max(stats['max_queries'], profile.count)
+            if suspects:
+                shape, count, _ = suspects[0]
+                stats['n_plus_one_requests'] += 1
+                stats['last_n_plus_one'] = {'count': count, 'statement': shape[:MAX_LOGGED_STATEMENT]}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                label: dict(stats, db_ms=round(stats['db_ms'], 3),
+                            avg_queries=round(stats['queries'] / stats['requests'], 2))
+                for label, stats in sorted(self.endpoints.items(), key=lambda item: -item[1]['queries'])
+            }
+
+profiler_stats = ProfilerStats()
+
+# Engine hooks, installed once and shared by every profile
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault('_profiler_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiles = _active.get()
+    starts = conn.info.get('_profiler_query_start')
+    if profiles and starts:
+        seconds = time.perf_counter() - starts.pop()
+        for profile in profiles:
+            profile.record(statement, seconds)
+
+_hooks_installed = False
+
+def _install_hooks():
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _hooks_installed = True
+
+@contextmanager
+def count_queries(label='block'):
+    """Record the statements run inside the block into the yielded QueryProfile."""
+    _install_hooks()
+    profile = QueryProfile(label)
+    token = _active.set(_active.get() + (profile,))
+    try:
+        yield profile
+    finally:
+        _active.reset(token)
+
+def assert_max_queries(client, path, max_queries, method='GET', **kwargs):
+    """
+    Request ``path`` with a Flask test ``client`` and fail if it ran more
+    than ``max_queries`` statements. Returns the response.
+    """
+    with count_queries(f'{method} {path}') as profile:
+        response = client.open(path, method=method, **kwargs)
+    if profile.count > max_queries:
+        raise AssertionError(f"Expected at most {max_queries} queries, got {profile.count}\n{profile.report()}")
+    return response
+
+# Request hooks
+def _start_request():
+    config = current_app.config
+    profile = QueryProfile(
+        request.endpoint or request.path,
+        slow_query_ms=config.get('SQL_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS)
+    )
+    request.environ['sql_profile'] = (profile, _active.set(_active.get() + (profile,)))
+
+def _finish_request(response):
+    entry = request.environ.get('sql_profile')
+    if entry is None:
+        return response
+    profile = entry[0]
+    response.headers['X-Query-Count'] = str(profile.count)
+    response.headers.add('Server-Timing', f'db;dur={profile.seconds * 1000:.2f};desc="{profile.count} queries"')
+    return response
+
+def _teardown_request(exc):
+    entry = request.environ.pop('sql_profile', None)
+    if entry is None:
+        return
+    profile, token = entry
+    _active.reset(token)
+
+    threshold = current_app.config.get('SQL_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+    suspects = profile.n_plus_one(threshold)
+    for shape, count, seconds in suspects:
+        print(f"Possible N+1 on {profile.label}: {count} x ({seconds * 1000:.1f}ms) {shape[:MAX_LOGGED_STATEMENT]}")
+    profiler_stats.add(profile, suspects)
+
+def init_sql_profiler(app):
+    """Profile every request to ``app``; only called when SQL_PROFILER is on."""
+    _install_hooks()
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,63 @@
+"""
+Startup cost report: how long importing and building the app took, and how
+much memory the process holds afterwards.
+
+With gunicorn's ``--preload`` the master pays these costs once and workers
+inherit the result copy-on-write, so a worker's own boot time should be a
+small fraction of the report's total.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def rss_kb():
+    """Current resident set size in KiB, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def max_rss_kb():
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    value = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return value // 1024 if sys.platform == 'darwin' else value
+
+class StartupReport:
+    def __init__(self, import_seconds=None):
+        self.pid = os.getpid()
+        self.phases = []
+        if import_seconds is not None:
+            self.phases.append(('imports', import_seconds))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def to_dict(self):
+        return {
+            'pid': self.pid,
+            'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in self.phases},
+            'total_ms': round(sum(seconds for _, seconds in self.phases) * 1000, 2),
+            'modules': len(sys.modules),
+            'rss_kb': rss_kb(),
+            'max_rss_kb': max_rss_kb()
+        }
+
+    def summary(self):
+        report = self.to_dict()
+        phases = ' '.join(f'{name}={ms}ms' for name, ms in report['phases_ms'].items())
+        return (f"Startup [pid {report['pid']}]: {report['total_ms']}ms ({phases}), "
+                f"{report['modules']} modules, rss {report['rss_kb']} KiB")
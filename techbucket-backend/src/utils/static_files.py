@@ -0,0 +1,145 @@
+"""
+Static file and SPA serving from an in-memory index.
+
+The static folder is walked once when the index is built (and again on
+``refresh()``), so requests never stat the filesystem to decide what to
+serve. Small files are held in memory. Pre-compressed ``.br``/``.gz``
+siblings produced by ``compress_static()`` are served when the client's
+Accept-Encoding allows. Vite's content-hashed bundles under ``assets/``
+are marked immutable for a year; everything else revalidates by ETag.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+from flask import Response, request, send_file
+
+# Vite names bundles like assets/index-B6Yaju6C.js
+FINGERPRINTED = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$')
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'application/xml')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+MEMORY_MAX_BYTES = 1024 * 1024
+
+class StaticVariant:
+    def __init__(self, path, encoding=None):
+        self.path = path
+        self.encoding = encoding
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.body = None
+        if self.size <= MEMORY_MAX_BYTES:
+            with open(path, 'rb') as f:
+                self.body = f.read()
+            digest = hashlib.sha256(self.body).hexdigest()[:32]
+        else:
+            digest = hashlib.sha256(f'{path}:{self.size}:{stat.st_mtime_ns}'.encode()).hexdigest()[:32]
+        self.etag = f'{digest}-{encoding}' if encoding else digest
+
+class StaticFile:
+    def __init__(self, relpath, path):
+        self.relpath = relpath
+        self.mimetype = mimetypes.guess_type(relpath)[0] or 'application/octet-stream'
+        self.identity = StaticVariant(path)
+        self.variants = {}
+        for encoding, suffix in ENCODINGS:
+            if os.path.isfile(path + suffix):
+                self.variants[encoding] = StaticVariant(path + suffix, encoding)
+
+        if FINGERPRINTED.match(relpath):
+            self.cache_control = IMMUTABLE_CACHE_CONTROL
+        elif relpath.endswith('.html'):
+            self.cache_control = REVALIDATE_CACHE_CONTROL
+        else:
+            self.cache_control = DEFAULT_CACHE_CONTROL
+
+    def choose(self, accept_encodings):
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding]:
+                return self.variants[encoding]
+        return self.identity
+
+class StaticIndex:
+    def __init__(self, root, fallback='index.html'):
+        self.root = root
+        self.fallback = fallback
+        self.files = {}
+        self.refresh()
+
+    def refresh(self):
+        files = {}
+        if self.root and os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if filename.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    relpath = os.path.relpath(path, self.root).replace(os.sep, '/')
+                    files[relpath] = StaticFile(relpath, path)
+        self.files = files
+
+    def serve(self, path):
+        entry = self.files.get(path) if path else None
+        if entry is None:
+            # SPA fallback: client-side routes all render index.html
+            entry = self.files.get(self.fallback)
+            if entry is None:
+                return "index.html not found", 404
+
+        variant = entry.choose(request.accept_encodings)
+        if variant.body is not None:
+            response = Response(variant.body, mimetype=entry.mimetype)
+            response.set_etag(variant.etag)
+            response.last_modified = variant.mtime
+            response.make_conditional(request)
+        else:
+            response = send_file(
+                variant.path, mimetype=entry.mimetype, etag=variant.etag,
+                last_modified=variant.mtime, conditional=True
+            )
+
+        if variant.encoding:
+            response.headers['Content-Encoding'] = variant.encoding
+        if entry.variants:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = entry.cache_control
+        return response
+
+def compress_static(root, min_size=1024):
+    """
+    Write ``.gz`` (and ``.br`` when the brotli package is installed) next to
+    every compressible file in ``root``. Returns the paths written.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    written = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                continue
+            mimetype = mimetypes.guess_type(filename)[0] or ''
+            path = os.path.join(dirpath, filename)
+            if not mimetype.startswith(COMPRESSIBLE_TYPES) or os.path.getsize(path) < min_size:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            with open(path + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            written.append(path + '.gz')
+            if brotli is not None:
+                with open(path + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+                written.append(path + '.br')
+    return written
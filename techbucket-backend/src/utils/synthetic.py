@@ -0,0 +1,354 @@
+"""
+Deterministic synthetic data for load and capacity testing.
+
+Rows are generated in fixed-size chunks. Each chunk draws from its own
+random stream seeded by ``(seed, table, first row id)`` and primary keys are
+assigned up front, counting on from the table's current maximum, so the data
+is identical for a given seed whatever the number of worker processes or the
+order the chunks finish in. A worker process opens its own engine and writes
+each chunk with one executemany INSERT in its own transaction.
+
+Tables load in dependency order (brands and categories, then products and
+events, then the submissions) so foreign keys hold on PostgreSQL. SQLite
+allows one writer at a time: chunks are still generated in parallel, and the
+busy timeout makes the inserts take turns.
+
+Skew is deliberate: products pile onto a few brands and categories, and
+event registrations follow a Zipf curve so a handful of events are heavily
+oversubscribed.
+
+Bulk inserts bypass the session hooks, so the caller reconciles counters,
+bumps cache versions and reindexes search afterwards (``finish_load()``).
+"""
+import bisect
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, time as dt_time
+from functools import lru_cache
+
+from sqlalchemy import create_engine, func, select, text
+
+from src.models.user import db
+from src.models.admin import Brand, Category, Product, Event
+from src.models.forms import QuoteRequest, SupportCase, Inquiry, EventRegistration
+from src.utils.cache import VERSIONED_TABLES, bump_versions
+from src.utils.counters import reconcile_counters
+from src.utils.search import SearchUnavailable, reindex
+
+CHUNK_SIZE = 10_000
+SQLITE_BUSY_TIMEOUT = 600
+
+# Load order; tables in the same phase only reference earlier phases
+PHASES = (
+    ('brands', 'categories'),
+    ('products', 'events'),
+    ('quote_requests', 'support_cases', 'inquiries', 'event_registrations')
+)
+MODELS = {
+    'brands': Brand,
+    'categories': Category,
+    'products': Product,
+    'events': Event,
+    'quote_requests': QuoteRequest,
+    'support_cases': SupportCase,
+    'inquiries': Inquiry,
+    'event_registrations': EventRegistration
+}
+
+FIRST_NAMES = ('Aarav', 'Sita', 'Ram', 'Gita', 'Bikash', 'Anita', 'Suman', 'Pooja', 'Rajesh', 'Nisha',
+               'Dipak', 'Sarita', 'Kiran', 'Manish', 'Asha', 'Prakash', 'Sunita', 'Rohan', 'Maya', 'Hari')
+LAST_NAMES = ('Shrestha', 'Sharma', 'Thapa', 'Gurung', 'Adhikari', 'Karki', 'Rai', 'Magar', 'Tamang', 'Joshi')
+ORGANIZATIONS = ('Himal Bank', 'Everest Telecom', 'Valley Hospital', 'Lalitpur College', 'Summit Hotels',
+                 'Nepal Logistics', 'Annapurna Insurance', 'Kathmandu Metro', 'Bagmati Traders', 'Gandaki Power')
+PRODUCT_WORDS = ('Switch', 'Router', 'Firewall', 'Server', 'Access Point', 'Storage Array', 'UPS', 'Rack',
+                 'Transceiver', 'Controller', 'Workstation', 'Gateway')
+ISSUE_TYPES = ('Hardware', 'Software', 'Network', 'Licensing', 'Warranty', 'Other')
+EVENT_TYPES = ('Workshop', 'Seminar', 'Conference', 'Training')
+LOCATIONS = ('Kathmandu', 'Lalitpur', 'Pokhara', 'Biratnagar', 'Online')
+
+# value -> weight; roughly what a live system accumulates
+QUOTE_STATUSES = {'pending': 10, 'quoted': 30, 'accepted': 25, 'rejected': 20, 'closed': 15}
+SUPPORT_STATUSES = {'open': 10, 'in_progress': 15, 'resolved': 35, 'closed': 40}
+INQUIRY_STATUSES = {'unread': 10, 'read': 40, 'replied': 50}
+REGISTRATION_STATUSES = {'registered': 80, 'attended': 12, 'cancelled': 8}
+PRIORITIES = {'Low': 30, 'Medium': 45, 'High': 20, 'Critical': 5}
+
+def zipf_cum_weights(n, s):
+    """Cumulative Zipf weights for ranks 1..n with exponent ``s``."""
+    total = 0.0
+    weights = []
+    for rank in range(1, n + 1):
+        total += 1.0 / rank ** s
+        weights.append(total)
+    return weights
+
+def _pick(rng, cum_weights):
+    """Index drawn by ``cum_weights``; ``random.choices`` without the list building."""
+    return bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+
+def _weighted(weights):
+    values = list(weights)
+    cum = []
+    total = 0
+    for value in values:
+        total += weights[value]
+        cum.append(total)
+    return values, cum
+
+class SyntheticPlan:
+    """
+    What to generate: ``counts`` per table, ids continuing from
+    ``offsets`` (each table's current maximum id), ``created_at`` spread
+    over the ``days`` before ``end``.
+    """
+
+    def __init__(self, counts, offsets, seed=0, end=None, days=730, chunk_size=CHUNK_SIZE, existing_ids=None,
+                 existing_events=None):
+        self.counts = {table: counts.get(table, 0) for table in MODELS}
+        self.offsets = {table: offsets.get(table, 0) for table in MODELS}
+        self.existing_ids = existing_ids or {}
+        self.existing_events = existing_events or {}
+        self.seed = seed
+        self.end = end or datetime.utcnow().replace(microsecond=0)
+        self.days = days
+        self.chunk_size = chunk_size
+
+    def chunks(self, table):
+        start = self.offsets[table] + 1
+        stop = start + self.counts[table]
+        for first in range(start, stop, self.chunk_size):
+            yield (table, first, min(first + self.chunk_size, stop))
+
+    def reference_ids(self, table):
+        """Ids a new row may point at: the generated rows, else the rows already there."""
+        if self.counts[table]:
+            return range(self.offsets[table] + 1, self.offsets[table] + self.counts[table] + 1)
+        return self.existing_ids.get(table, ())
+
+class RowFactory:
+    """Builds the rows of one chunk. Everything random comes from ``rng``."""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.span_seconds = plan.days * 86400
+        self.quote_statuses = _weighted(QUOTE_STATUSES)
+        self.support_statuses = _weighted(SUPPORT_STATUSES)
+        self.inquiry_statuses = _weighted(INQUIRY_STATUSES)
+        self.registration_statuses = _weighted(REGISTRATION_STATUSES)
+        self.priorities = _weighted(PRIORITIES)
+        self._zipf = {}
+
+    def _skewed_id(self, rng, table, s):
+        ids = self.plan.reference_ids(table)
+        if not ids:
+            raise ValueError(f'No {table} to reference; generate some or seed the database first')
+        weights = self._zipf.get((table, s))
+        if weights is None:
+            weights = self._zipf[(table, s)] = zipf_cum_weights(len(ids), s)
+        return ids[_pick(rng, weights)]
+
+    def _choice(self, rng, weighted):
+        values, cum = weighted
+        return values[_pick(rng, cum)]
+
+    def _created_at(self, rng):
+        # Squared draw leans towards recent rows, as steady growth would
+        return self.plan.end - timedelta(seconds=int(self.span_seconds * rng.random() ** 2))
+
+    def _person(self, rng):
+        first = FIRST_NAMES[rng.randrange(len(FIRST_NAMES))]
+        last = LAST_NAMES[rng.randrange(len(LAST_NAMES))]
+        return f'{first} {last}', f'98{rng.randrange(10 ** 8):08d}'
+
+    def brands(self, rng, row_id):
+        created = self._created_at(rng)
+        return {
+            'id': row_id, 'name': f'Synthetic Brand {row_id}',
+            'description': f'Generated brand {row_id}', 'website': f'https://brand{row_id}.example.com',
+            'is_active': rng.random() < 0.95, 'created_at': created, 'updated_at': created
+        }
+
+    def categories(self, rng, row_id):
+        created = self._created_at(rng)
+        return {
+            'id': row_id, 'name': f'Synthetic Category {row_id}', 'description': f'Generated category {row_id}',
+            'icon': 'fas fa-box', 'is_active': rng.random() < 0.95, 'created_at': created, 'updated_at': created
+        }
+
+    def products(self, rng, row_id):
+        word = PRODUCT_WORDS[rng.randrange(len(PRODUCT_WORDS))]
+        created = self._created_at(rng)
+        return {
+            'id': row_id,
+            'name': f'{word} {rng.choice("ABCDEFGHJKLMNPRSTX")}{rng.randrange(100, 10000)}',
+            'description': f'{word} for enterprise deployments, generated row {row_id}.',
+            'specifications': [f'Ports: {rng.choice((8, 16, 24, 48))}', f'Warranty: {rng.randint(1, 5)} years',
+                               f'Power: {rng.randrange(50, 1500)}W'],
+            'price': round(rng.lognormvariate(7, 1.2), 2),
+            'is_active': rng.random() < 0.9,
+            'featured': rng.random() < 0.05,
+            'brand_id': self._skewed_id(rng, 'brands', 1.0),
+            'category_id': self._skewed_id(rng, 'categories', 0.8),
+            'created_at': created,
+            'updated_at': created
+        }
+
+    def events(self, rng, row_id):
+        return event_row(self.plan.seed, self.plan.end, self.plan.days, row_id)
+
+    def quote_requests(self, rng, row_id):
+        name, contact = self._person(rng)
+        return {
+            'id': row_id,
+            'product_name': f'{PRODUCT_WORDS[rng.randrange(len(PRODUCT_WORDS))]} {rng.randrange(100, 10000)}',
+            'quantity': rng.randint(1, 50), 'name': name, 'contact': contact,
+            'email': f'buyer{row_id}@example.com', 'company': ORGANIZATIONS[rng.randrange(len(ORGANIZATIONS))],
+            'requirements': 'Rack mount, 3 year support' if rng.random() < 0.5 else None,
+            'status': self._choice(rng, self.quote_statuses), 'created_at': self._created_at(rng)
+        }
+
+    def support_cases(self, rng, row_id):
+        name, contact = self._person(rng)
+        issue = ISSUE_TYPES[rng.randrange(len(ISSUE_TYPES))]
+        return {
+            'id': row_id, 'name': name, 'organization_name': ORGANIZATIONS[rng.randrange(len(ORGANIZATIONS))],
+            'contact': contact, 'organization_email': f'it{row_id}@example.com', 'issue_type': issue,
+            'priority': self._choice(rng, self.priorities), 'subject': f'{issue} issue #{row_id}',
+            'description': f'{issue} problem reported on site, generated row {row_id}.',
+            'status': self._choice(rng, self.support_statuses), 'created_at': self._created_at(rng)
+        }
+
+    def inquiries(self, rng, row_id):
+        name, contact = self._person(rng)
+        return {
+            'id': row_id, 'name': name, 'organization_name': ORGANIZATIONS[rng.randrange(len(ORGANIZATIONS))],
+            'contact': contact, 'organization_email': f'info{row_id}@example.com',
+            'subject': f'Inquiry #{row_id}', 'message': 'Please share pricing and availability.',
+            'status': self._choice(rng, self.inquiry_statuses), 'created_at': self._created_at(rng)
+        }
+
+    def event_registrations(self, rng, row_id):
+        name, contact = self._person(rng)
+        event_id = self._skewed_id(rng, 'events', 1.2)
+        # Copy the referenced event as it is stored, not a synthetic stand-in for an existing id
+        event = self.plan.existing_events.get(event_id) or event_row(self.plan.seed, self.plan.end, self.plan.days, event_id)
+        return {
+            'id': row_id, 'event_id': event_id, 'event_name': event['title'],
+            'event_date': event['date'].isoformat(), 'event_time': event['time'].strftime('%H:%M'),
+            'event_price': f"NPR {event['price']:.0f}" if event['price'] else 'Free',
+            'name': name, 'contact': contact, 'email': f'attendee{row_id}@example.com',
+            'status': self._choice(rng, self.registration_statuses), 'created_at': self._created_at(rng)
+        }
+
+    def rows(self, table, first, stop):
+        rng = random.Random(f'{self.plan.seed}:{table}:{first}')
+        build = getattr(self, table)
+        return [build(rng, row_id) for row_id in range(first, stop)]
+
+@lru_cache(maxsize=65536)
+def event_row(seed, end, days, row_id):
+    # Seeded per event so registrations can rebuild the event they point at
+    rng = random.Random(f'{seed}:events:{row_id}')
+    created = end - timedelta(seconds=rng.randrange(days * 86400))
+    event_type = EVENT_TYPES[rng.randrange(len(EVENT_TYPES))]
+    return {
+        'id': row_id, 'title': f'{event_type} {row_id}', 'description': f'Generated {event_type.lower()} {row_id}',
+        'date': (created + timedelta(days=rng.randint(7, 90))).date(),
+        'time': dt_time(rng.choice((9, 10, 14, 16)), 0),
+        'location': LOCATIONS[rng.randrange(len(LOCATIONS))], 'capacity': rng.choice((30, 50, 100, 250)),
+        'price': rng.choice((0, 0, 500, 1500, 5000)), 'event_type': event_type,
+        'status': rng.choice(('Open', 'Early Bird', 'Limited', 'Closed')),
+        'agenda': ['Registration', 'Keynote', 'Hands-on session', 'Q&A'],
+        'is_active': rng.random() < 0.9, 'created_at': created, 'updated_at': created
+    }
+
+# Worker processes
+_worker = {}
+
+def _init_worker(database_uri, plan):
+    connect_args = {'timeout': SQLITE_BUSY_TIMEOUT} if database_uri.startswith('sqlite') else {}
+    _worker['engine'] = create_engine(database_uri, connect_args=connect_args)
+    _worker['factory'] = RowFactory(plan)
+
+def _load_chunk(chunk):
+    table, first, stop = chunk
+    rows = _worker['factory'].rows(table, first, stop)
+    with _worker['engine'].begin() as connection:
+        connection.execute(MODELS[table].__table__.insert(), rows)
+    return table, len(rows)
+
+def table_offsets(tables=MODELS):
+    """Current maximum id of each table, so generated ids never collide."""
+    return {table: db.session.scalar(select(func.max(MODELS[table].id))) or 0 for table in tables}
+
+def existing_reference_ids(counts):
+    """Ids of the existing brands, categories and events that generated rows will point at instead."""
+    return {
+        table: db.session.scalars(select(MODELS[table].id).order_by(MODELS[table].id)).all()
+        for table in ('brands', 'categories', 'events') if not counts.get(table)
+    }
+
+def existing_events(counts):
+    """Title, date, time and price of each existing event that generated registrations will point at."""
+    if counts.get('events') or not counts.get('event_registrations'):
+        return {}
+    return {
+        row.id: {'title': row.title, 'date': row.date, 'time': row.time, 'price': row.price}
+        for row in db.session.execute(select(Event.id, Event.title, Event.date, Event.time, Event.price))
+    }
+
+def generate(database_uri, plan, workers=1, echo=print):
+    """Load ``plan`` into ``database_uri``. Returns rows written per table."""
+    totals = {table: 0 for table in MODELS}
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(database_uri, plan))
+        run = lambda chunks: executor.map(_load_chunk, chunks)
+    else:
+        executor = None
+        _init_worker(database_uri, plan)
+        run = lambda chunks: map(_load_chunk, chunks)
+
+    try:
+        for phase in PHASES:
+            started = time.perf_counter()
+            chunks = [chunk for table in phase for chunk in plan.chunks(table)]
+            for table, count in run(chunks):
+                totals[table] += count
+            rows = sum(totals[table] for table in phase)
+            if rows:
+                elapsed = time.perf_counter() - started
+                echo(f"{', '.join(phase)}: {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        else:
+            _worker.pop('engine').dispose()
+    return totals
+
+def finish_load(totals, index_search=True):
+    """
+    Bring derived state in line after ``generate()``: PostgreSQL sequences,
+    dashboard counters, catalog cache versions and the search index.
+    The caller commits.
+    """
+    connection = db.session.connection()
+    changed = [table for table, count in totals.items() if count]
+    if connection.dialect.name == 'postgresql':
+        # Explicit ids leave the serial sequences behind the data
+        for table in changed:
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            ))
+
+    reconcile_counters([MODELS[table] for table in changed])
+    catalog = [table for table in changed if table in VERSIONED_TABLES]
+    if catalog:
+        bump_versions(*catalog)
+    indexed = 0
+    if index_search and ('products' in changed or 'events' in changed):
+        try:
+            indexed = reindex(['product', 'event'])
+        except SearchUnavailable:
+            pass
+    return indexed
@@ -0,0 +1,9 @@
+"""
+WSGI entry point: ``gunicorn -c gunicorn.conf.py src.wsgi:app``.
+
+With ``preload_app`` the app is built once in the master and forked into
+the workers; see gunicorn.conf.py for the per-worker hooks.
+"""
+from src.main import create_app
+
+app = create_app()
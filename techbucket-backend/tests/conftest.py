@@ -0,0 +1,38 @@
+import pytest
+
+from src.main import create_app
+from src.migrations import seed, upgrade
+from src.models.user import db
+from src.utils.admin_auth import get_admin_cache
+from src.utils.cache import get_catalog_cache
+
+def _quiet(*args):
+    pass
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATE_LIMIT_ENABLED': False,
+        'STARTUP_REPORT': False
+    })
+    with app.app_context():
+        upgrade(echo=_quiet)
+        seed(echo=_quiet)
+        # Per-worker caches outlive the app; don't let one test's database leak into the next
+        get_catalog_cache().clear()
+        get_admin_cache().clear()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def admin_client(client):
+    response = client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin'})
+    assert response.status_code == 200
+    return client
@@ -0,0 +1,80 @@
+from datetime import date, datetime, time, timedelta
+
+from src.main import create_app
+from src.migrations import upgrade
+from src.models.user import db
+from src.models.admin import Brand, Category, Event, Product
+from src.models.cache import CacheVersion
+from src.models.forms import EventRegistration
+from src.utils.cache import VERSIONED_TABLES
+
+def backdate_versions(hours=1):
+    CacheVersion.query.update({'updated_at': datetime.utcnow() - timedelta(hours=hours)})
+    db.session.commit()
+
+def add_products(count):
+    brand = Brand(name='Test Brand')
+    category = Category(name='Test Category')
+    db.session.add_all([brand, category])
+    db.session.flush()
+    db.session.add_all([
+        Product(name=f'Product {i}', price=i, brand_id=brand.id, category_id=category.id) for i in range(count)
+    ])
+    db.session.commit()
+
+def test_product_list_revalidates_from_cache_versions(app, client):
+    with app.app_context():
+        add_products(3)
+        backdate_versions()
+
+    first = client.get('/api/catalog/products')
+    assert first.status_code == 200
+    assert first.last_modified is not None
+    assert client.get('/api/catalog/products', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert client.get('/api/catalog/products', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+
+    # Hard-deleting the newest product must not move the validators backwards
+    with app.app_context():
+        db.session.delete(Product.query.order_by(Product.updated_at.desc()).first())
+        db.session.commit()
+
+    for headers in ({'If-None-Match': first.headers['ETag']}, {'If-Modified-Since': first.headers['Last-Modified']}):
+        response = client.get('/api/catalog/products', headers=headers)
+        assert response.status_code == 200
+        assert len(response.get_json()['data']) == 2
+
+def test_no_last_modified_in_the_second_of_a_write(app, client):
+    with app.app_context():
+        add_products(1)
+
+    response = client.get('/api/catalog/products')
+    assert response.status_code == 200
+    assert response.last_modified is None
+
+def test_event_list_revalidates_on_registration(app, client):
+    with app.app_context():
+        event = Event(title='Launch', date=date.today() + timedelta(days=7), time=time(10, 0))
+        db.session.add(event)
+        db.session.commit()
+        event_id = event.id
+        backdate_versions()
+
+    first = client.get('/api/catalog/events')
+    assert first.get_json()['data'][0]['registration_count'] == 0
+    assert client.get('/api/catalog/events', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    with app.app_context():
+        db.session.add(EventRegistration(event_id=event_id, event_name='Launch', name='Attendee',
+                                         contact='9800000000', email='a@example.com', status='registered'))
+        db.session.commit()
+
+    response = client.get('/api/catalog/events', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()['data'][0]['registration_count'] == 1
+
+def test_upgrade_alone_creates_every_cache_version(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'unseeded.db'}", 'STARTUP_REPORT': False})
+    with app.app_context():
+        upgrade(echo=lambda *args: None)
+        assert {row.table_name for row in CacheVersion.query.all()} == set(VERSIONED_TABLES)
+        db.engine.dispose()
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+from flask import jsonify
+
+from src.models.user import db
+from src.models.forms import QuoteRequest
+from src.models.idempotency import IdempotencyKey
+from src.models.outbox import EmailOutbox
+from src.utils import idempotency
+
+QUOTE = {'name': 'Asha', 'contact': '9800000000', 'officeEmail': 'asha@example.com',
+         'productName': 'Switch', 'quantity': 2}
+
+def counts(app):
+    with app.app_context():
+        return QuoteRequest.query.count(), EmailOutbox.query.count()
+
+def test_submission_is_not_committed_without_its_stored_response(app, client, monkeypatch):
+    def failing_complete(key, reserved_at, response):
+        raise RuntimeError('database went away')
+    monkeypatch.setattr(idempotency, 'complete', failing_complete)
+
+    headers = {'Idempotency-Key': 'quote-1'}
+    assert client.post('/api/quote-request', json=QUOTE, headers=headers).status_code == 500
+    # Rolled back with the failed write, and the key released for a retry
+    assert counts(app) == (0, 0)
+    monkeypatch.undo()
+
+    assert client.post('/api/quote-request', json=QUOTE, headers=headers).status_code == 201
+    replay = client.post('/api/quote-request', json=QUOTE, headers=headers)
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert counts(app) == (1, 1)
+
+def test_request_whose_key_was_taken_over_rolls_back(app):
+    now = datetime.utcnow()
+    stale = now - timedelta(minutes=5)
+    with app.test_request_context():
+        db.session.add(IdempotencyKey(key='k', scope='quote-request', request_hash='h',
+                                      created_at=now, expires_at=now + timedelta(hours=1)))
+        db.session.commit()
+
+        # The original request, reserved at ``stale``, finishes after another took the key over
+        db.session.add(QuoteRequest(name='Asha', contact='1', email='a@example.com', product_name='Switch', quantity=1))
+        assert idempotency.complete('k', stale, jsonify({'success': True})) is False
+        assert QuoteRequest.query.count() == 0
+        assert db.session.get(IdempotencyKey, 'k').status_code is None
@@ -0,0 +1,129 @@
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from src.models.user import db
+from src.models.outbox import EmailOutbox
+from src.utils.mailer import BACKOFF_BASE_SECONDS, OutboxWorker, queue_email
+
+class RecordingHandler:
+    """Accepts every message, or answers DATA with ``reply`` when it is set."""
+
+    def __init__(self):
+        self.messages = []
+        self.reply = None
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reply:
+            return self.reply
+        self.messages.append(envelope)
+        return '250 OK'
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp(app):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname='127.0.0.1', port=_free_port())
+    controller.start()
+    app.config.update(
+        MAIL_SERVER='127.0.0.1', MAIL_PORT=controller.port, MAIL_USE_TLS=False,
+        MAIL_USERNAME='', MAIL_OUTBOX_MAX_ATTEMPTS=3
+    )
+    yield handler
+    controller.stop()
+
+@pytest.fixture
+def worker(app, smtp):
+    worker = OutboxWorker(app, threads=1)
+    yield worker
+    worker.pool.close()
+
+def queue_message(app, subject='Hello'):
+    with app.app_context():
+        message = queue_email('customer@example.com', subject, 'Body')
+        db.session.commit()
+        return message.id
+
+def load(app, message_id):
+    with app.app_context():
+        message = db.session.get(EmailOutbox, message_id)
+        db.session.expunge(message)
+        return message
+
+def make_due(app, message_id):
+    with app.app_context():
+        db.session.get(EmailOutbox, message_id).next_attempt_at = datetime.utcnow()
+        db.session.commit()
+
+def test_message_is_delivered_over_smtp(app, smtp, worker):
+    message_ids = [queue_message(app, subject=f'Message {n}') for n in range(3)]
+
+    assert worker.run_once() == 3
+    assert sorted(envelope.content.decode().split('Subject: ')[1].splitlines()[0] for envelope in smtp.messages) == \
+        ['Message 0', 'Message 1', 'Message 2']
+    assert all(envelope.rcpt_tos == ['customer@example.com'] for envelope in smtp.messages)
+    for message_id in message_ids:
+        message = load(app, message_id)
+        assert (message.status, message.attempts, message.last_error) == ('sent', 1, None)
+        assert message.sent_at is not None
+    # One connection carried all three messages
+    assert worker.pool.opened == 1
+    assert worker.stats.to_dict()['sent'] == 3
+
+def test_transient_failure_is_retried_with_backoff(app, smtp, worker):
+    smtp.reply = '451 Try again later'
+    message_id = queue_message(app)
+
+    before = datetime.utcnow()
+    assert worker.run_once() == 1
+    message = load(app, message_id)
+    assert (message.status, message.attempts) == ('pending', 1)
+    assert '451' in message.last_error
+    assert message.next_attempt_at >= before + timedelta(seconds=BACKOFF_BASE_SECONDS)
+
+    # Not due yet, so not claimed again
+    assert worker.run_once() == 0
+
+    make_due(app, message_id)
+    before = datetime.utcnow()
+    assert worker.run_once() == 1
+    message = load(app, message_id)
+    assert (message.status, message.attempts) == ('pending', 2)
+    # The delay doubles with each attempt
+    assert message.next_attempt_at >= before + timedelta(seconds=2 * BACKOFF_BASE_SECONDS)
+
+    smtp.reply = None
+    make_due(app, message_id)
+    assert worker.run_once() == 1
+    assert load(app, message_id).status == 'sent'
+    assert len(smtp.messages) == 1
+
+def test_message_is_dead_lettered_after_max_attempts(app, smtp, worker):
+    smtp.reply = '451 Try again later'
+    message_id = queue_message(app)
+
+    for attempt in range(1, 4):
+        make_due(app, message_id)
+        assert worker.run_once() == 1
+        message = load(app, message_id)
+        assert message.attempts == attempt
+    assert message.status == 'dead'
+
+    # Dead messages are never claimed again
+    make_due(app, message_id)
+    assert worker.run_once() == 0
+    assert worker.stats.to_dict()['dead'] == 1
+
+def test_permanent_failure_is_dead_lettered_immediately(app, smtp, worker):
+    smtp.reply = '550 No such user'
+    message_id = queue_message(app)
+
+    assert worker.run_once() == 1
+    message = load(app, message_id)
+    assert (message.status, message.attempts) == ('dead', 1)
@@ -0,0 +1,31 @@
+from src.main import create_app
+
+def metric_lines(client, prefix):
+    body = client.get('/metrics').get_data(as_text=True)
+    return [line for line in body.splitlines() if line.startswith(prefix)]
+
+def test_metrics_include_pool_telemetry(app, client):
+    def checkouts():
+        lines = metric_lines(client, 'db_pool_checkouts_total ')
+        return float(lines[0].split()[1]) if lines else 0
+
+    before = checkouts()
+    assert client.get('/api/catalog/brands').status_code == 200
+    assert checkouts() > before
+
+    assert metric_lines(client, 'db_pool_checkout_wait_seconds_bucket{le="+Inf"}')
+    assert metric_lines(client, 'db_pool_checkout_wait_seconds_count ')
+    assert metric_lines(client, 'db_pool_size ') == [f"db_pool_size {app.config['DB_POOL_SIZE']}"]
+    # The /metrics request itself doesn't hold a connection while rendering
+    assert metric_lines(client, 'db_pool_checked_out ') == ['db_pool_checked_out 0']
+    assert metric_lines(client, 'db_pool_overflow ') == ['db_pool_overflow 0']
+
+def test_request_latency_histogram_keeps_its_labels(app, client):
+    client.get('/healthz')
+    lines = metric_lines(client, 'http_request_duration_seconds_bucket{blueprint="health",endpoint="health.healthz"')
+    assert lines[-1].startswith('http_request_duration_seconds_bucket{blueprint="health",endpoint="health.healthz",method="GET",le="+Inf"}')
+
+def test_metrics_not_served_when_disabled(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'disabled.db'}", 'METRICS_ENABLED': False,
+                      'STARTUP_REPORT': False})
+    assert app.test_client().get('/metrics').status_code == 404
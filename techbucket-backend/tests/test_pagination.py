@@ -0,0 +1,79 @@
+from src.models.user import db
+from src.models.admin import Brand, Category, Product
+from src.models.forms import Inquiry
+
+def test_reference_lists_are_not_paginated(app, admin_client):
+    with app.app_context():
+        db.session.add_all([Brand(name=f'Brand {i}') for i in range(150)])
+        db.session.add_all([Category(name=f'Category {i}') for i in range(150)])
+        db.session.commit()
+        brands, categories = Brand.query.count(), Category.query.count()
+
+    for path, total in (('/api/admin/brands', brands), ('/api/admin/categories', categories)):
+        body = admin_client.get(path).get_json()
+        assert len(body['data']) == total
+        assert body['next_cursor'] is None
+
+def test_following_next_cursor_returns_every_product(app, admin_client):
+    with app.app_context():
+        brand, category = Brand(name='Test Brand'), Category(name='Test Category')
+        db.session.add_all([brand, category])
+        db.session.flush()
+        db.session.add_all([
+            Product(name=f'Product {i}', price=i, brand_id=brand.id, category_id=category.id) for i in range(250)
+        ])
+        db.session.commit()
+        total = Product.query.count()
+
+    ids, cursor = [], None
+    while True:
+        body = admin_client.get('/api/admin/products', query_string={'cursor': cursor} if cursor else {}).get_json()
+        assert len(body['data']) <= 100
+        ids += [product['id'] for product in body['data']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert len(ids) == len(set(ids)) == total
+
+def test_submission_lists_page_through_the_next_cursor_header(app, admin_client):
+    with app.app_context():
+        db.session.add_all([
+            Inquiry(name=f'Visitor {i}', organization_name='Acme', contact='9800000000',
+                    organization_email='info@acme.test', subject=f'Hello {i}', message='Hi')
+            for i in range(150)
+        ])
+        db.session.commit()
+
+    ids, cursor = [], None
+    while True:
+        response = admin_client.get('/api/admin/inquiries', query_string={'cursor': cursor} if cursor else {},
+                                    headers={'Origin': 'https://techbucket.example'})
+        # Cross-origin scripts can only read the cursor if CORS exposes it
+        assert 'X-Next-Cursor' in response.headers['Access-Control-Expose-Headers']
+        ids += [inquiry['id'] for inquiry in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert len(ids) == len(set(ids)) == 150
+
+def test_rows_without_created_at_do_not_end_paging(app, admin_client):
+    with app.app_context():
+        db.session.add_all([
+            Inquiry(name=f'Visitor {i}', organization_name='Acme', contact='9800000000',
+                    organization_email='info@acme.test', subject=f'Hello {i}', message='Hi')
+            for i in range(9)
+        ])
+        db.session.commit()
+        # Rows inserted by older code or raw SQL may have no created_at
+        Inquiry.query.filter(Inquiry.id % 3 == 0).update({'created_at': None})
+        db.session.commit()
+
+    ids, cursor = [], None
+    while True:
+        response = admin_client.get('/api/admin/inquiries', query_string={'limit': 2, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids += [inquiry['id'] for inquiry in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert len(ids) == len(set(ids)) == 9
@@ -0,0 +1,40 @@
+from src.models.admin import Product
+from src.utils.counters import read_counters
+
+def post_import(client, body, content_type='text/csv'):
+    return client.post('/api/admin/products/import', data=body, content_type=content_type)
+
+def test_errors_are_reported_by_file_line(app, admin_client):
+    body = (
+        'name,brand,category,price,description\n'
+        'Switch A,Cisco,Switches,100,"Two\nlines"\n'
+        ',Cisco,Switches,100,no name\n'
+        'Switch B,Cisco,Switches,abc,bad price\n'
+    ).encode()
+    response = post_import(admin_client, body)
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['created'] == 1
+    assert [error['line'] for error in result['errors']] == [4, 5]
+
+    ndjson = b'{"name": "AP", "brand": "Ubiquiti", "category": "Wireless"}\n\nnot json\n'
+    result = post_import(admin_client, ndjson, 'application/x-ndjson').get_json()
+    assert result['created'] == 1
+    assert [error['line'] for error in result['errors']] == [3]
+
+def test_unreadable_file_reports_committed_rows_and_reconciles(app, admin_client):
+    with app.app_context():
+        before = Product.query.count()
+
+    rows = ''.join(f'Router {i},Mikrotik,Routers,{i}\n' for i in range(2500))
+    body = ('name,brand,category,price\n' + rows).encode() + b'\xff\xfe,broken\n'
+    response = post_import(admin_client, body)
+    assert response.status_code == 400
+    result = response.get_json()
+    assert 'Could not read import file' in result['error']
+    assert result['committed'] >= 2000
+    assert result['committed_through_line'] == result['committed'] + 1
+
+    with app.app_context():
+        assert Product.query.count() == before + result['committed']
+        assert read_counters()['total_products'] == before + result['committed']
@@ -0,0 +1,81 @@
+from datetime import date, time, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.admin import Brand, Category, Event, Product
+from src.models.forms import EventRegistration
+from src.utils.sql_profiler import assert_max_queries
+
+def add_products(count):
+    brands = [Brand(name=f'Test Brand {i}') for i in range(5)]
+    categories = [Category(name=f'Test Category {i}') for i in range(5)]
+    db.session.add_all(brands + categories)
+    db.session.flush()
+    db.session.add_all([
+        Product(name=f'Product {i}', price=i, brand_id=brands[i % 5].id, category_id=categories[i % 3].id)
+        for i in range(count)
+    ])
+    db.session.commit()
+
+def add_events(count, registrations_per_event):
+    events = [Event(title=f'Event {i}', date=date.today() + timedelta(days=i), time=time(10, 0)) for i in range(count)]
+    db.session.add_all(events)
+    db.session.flush()
+    db.session.add_all([
+        EventRegistration(event_id=event.id, event_name=event.title, name=f'Attendee {n}',
+                          contact='9800000000', email=f'a{n}@example.com',
+                          status='cancelled' if n % 4 == 0 else 'registered')
+        for event in events for n in range(registrations_per_event)
+    ])
+    db.session.commit()
+
+# The same bound holds at both sizes: the number of queries doesn't grow with the rows
+@pytest.mark.parametrize('count', [3, 60])
+@pytest.mark.parametrize('normalized', ['0', '1'])
+def test_product_list_queries_do_not_grow_with_products(app, admin_client, count, normalized):
+    with app.app_context():
+        add_products(count)
+
+    response = assert_max_queries(admin_client, f'/api/admin/products?normalized={normalized}', 2)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body['data']) == count
+    if normalized == '1':
+        assert body['data'][0]['brand_id'] in {int(brand_id) for brand_id in body['brands']}
+    else:
+        assert body['data'][0]['brand']['name'].startswith('Test Brand')
+
+@pytest.mark.parametrize('count, registrations', [(2, 1), (20, 15)])
+def test_event_list_queries_do_not_grow_with_registrations(app, admin_client, count, registrations):
+    with app.app_context():
+        add_events(count, registrations)
+
+    response = assert_max_queries(admin_client, '/api/admin/events', 2)
+    assert response.status_code == 200
+    counts = {event['registration_count'] for event in response.get_json()['data']}
+    # Every fourth registration is cancelled and doesn't hold a seat
+    assert counts == {registrations - len(range(0, registrations, 4))}
+
+def test_assert_max_queries_reports_the_statements(app, admin_client):
+    with app.app_context():
+        add_products(3)
+
+    with pytest.raises(AssertionError, match='queries'):
+        assert_max_queries(admin_client, '/api/admin/products', 0)
+
+def test_registrations_without_a_status_hold_a_seat(app, admin_client):
+    with app.app_context():
+        event = Event(title='Launch', date=date.today(), time=time(10, 0))
+        db.session.add(event)
+        db.session.flush()
+        db.session.add_all([
+            EventRegistration(event_id=event.id, event_name=event.title, name=f'Attendee {n}',
+                              contact='9800000000', email=f'a{n}@example.com', status=status)
+            for n, status in enumerate(['registered', 'registered', 'cancelled'])
+        ])
+        db.session.commit()
+        # The column default fills in a status; rows from older code or raw SQL may have none
+        EventRegistration.query.filter_by(name='Attendee 0').update({'status': None})
+        db.session.commit()
+        assert Event.registration_counts([event.id]) == {event.id: 2}
@@ -0,0 +1,33 @@
+from sqlalchemy import inspect
+
+from src.models.user import db
+from src.utils import rate_limit as rate_limit_module
+from src.utils.rate_limit import DatabaseBackend, MemoryBackend
+
+def test_upgrade_creates_the_bucket_table(app):
+    with app.app_context():
+        assert 'rate_limit_buckets' in inspect(db.engine).get_table_names()
+        backend = DatabaseBackend(app.config['SQLALCHEMY_DATABASE_URI'])
+        assert [backend.take('forms:1.2.3.4', 1.0, 1, 100.0)[0] for _ in range(2)] == [True, False]
+        backend.engine.dispose()
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_keys=3)
+    for client in ('a', 'b', 'c'):
+        backend.take(client, 1.0, 1, 100.0)
+    # 'a' is touched again, so 'b' is now the oldest
+    assert backend.take('a', 1.0, 1, 100.0) == (False, 1)
+    backend.take('d', 1.0, 1, 100.0)
+    assert list(backend._buckets) == ['c', 'a', 'd']
+
+def test_clients_behind_the_proxy_get_their_own_buckets(app, monkeypatch):
+    app.config['RATE_LIMIT_ENABLED'] = True
+    monkeypatch.setattr(rate_limit_module, '_rate_limiter', None)
+    client = app.test_client()
+
+    def post(ip):
+        return client.post('/api/inquiry', json={}, headers={'X-Forwarded-For': ip}).status_code
+
+    assert [post('203.0.113.1') for _ in range(app.config['RATE_LIMIT_FORMS_BURST'])].count(429) == 0
+    assert post('203.0.113.1') == 429
+    assert post('203.0.113.2') != 429
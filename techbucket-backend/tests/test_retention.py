@@ -0,0 +1,90 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from src.models.user import db
+from src.models.admin import Event
+from src.models.archive import ArchivedSubmission
+from src.models.forms import EventRegistration, Inquiry
+from src.utils import retention
+from src.utils.counters import read_counters
+from src.utils.retention import RetentionPolicy, archive_chunk, archive_expired
+
+LONG_AGO = datetime.utcnow() - timedelta(days=800)
+
+def add_past_registrations(count):
+    event = Event(title='Last year', date=date.today() - timedelta(days=400), time=time(10, 0))
+    db.session.add(event)
+    db.session.flush()
+    db.session.add_all([
+        EventRegistration(event_id=event.id, event_name=event.title, name=f'Attendee {n}', contact='9800000000',
+                          email=f'a{n}@example.com', status='registered', created_at=LONG_AGO)
+        for n in range(count)
+    ])
+    db.session.commit()
+
+def test_archive_chunk_leaves_rows_that_no_longer_match(app, monkeypatch):
+    with app.app_context():
+        db.session.add_all([
+            Inquiry(name=name, organization_name='Acme', contact='9800000000', organization_email='info@acme.test',
+                    subject='Hello', message='Hi', status='read', created_at=LONG_AGO)
+            for name in ('Old', 'Reopened')
+        ])
+        db.session.commit()
+        policy = RetentionPolicy('inquiries', days=365, exclude_statuses=['unread'])
+
+        # Reopen one inquiry between the id select and the DELETE, as a concurrent admin edit would
+        original = policy.criteria
+        calls = []
+        def criteria(now=None):
+            calls.append(1)
+            if len(calls) == 2:
+                Inquiry.query.filter_by(name='Reopened').update({'status': 'unread'})
+            return original(now)
+        monkeypatch.setattr(policy, 'criteria', criteria)
+
+        assert archive_chunk(policy) == 1
+        assert [row.data['name'] for row in ArchivedSubmission.query.all()] == ['Old']
+        assert [inquiry.name for inquiry in Inquiry.query.all()] == ['Reopened']
+
+def test_archive_expired_continues_past_a_short_chunk(app, monkeypatch):
+    with app.app_context():
+        db.session.add_all([
+            Inquiry(name=name, organization_name='Acme', contact='9800000000', organization_email='info@acme.test',
+                    subject='Hello', message='Hi', status='read', created_at=LONG_AGO)
+            for name in ('First', 'Reopened', 'Last')
+        ])
+        db.session.commit()
+        policy = RetentionPolicy('inquiries', days=365, exclude_statuses=['unread'])
+
+        # The first chunk selects two rows but moves only one
+        original = policy.criteria
+        calls = []
+        def criteria(now=None):
+            calls.append(1)
+            if len(calls) == 2:
+                Inquiry.query.filter_by(name='Reopened').update({'status': 'unread'})
+            return original(now)
+        monkeypatch.setattr(policy, 'criteria', criteria)
+
+        assert archive_expired(policy, chunk_size=2) == 2
+        assert sorted(row.data['name'] for row in ArchivedSubmission.query.all()) == ['First', 'Last']
+        assert [inquiry.name for inquiry in Inquiry.query.all()] == ['Reopened']
+
+def test_archive_expired_reconciles_after_a_failed_chunk(app, monkeypatch):
+    with app.app_context():
+        add_past_registrations(3)
+        assert read_counters()['recent_registrations'] == 3
+
+        calls = []
+        def failing_chunk(policy, chunk_size, now):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return archive_chunk(policy, chunk_size, now)
+        monkeypatch.setattr(retention, 'archive_chunk', failing_chunk)
+
+        with pytest.raises(RuntimeError):
+            archive_expired(RetentionPolicy('event-registrations', days=365), chunk_size=1)
+        assert EventRegistration.query.count() == 2
+        assert read_counters()['recent_registrations'] == 2
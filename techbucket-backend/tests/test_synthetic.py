@@ -0,0 +1,28 @@
+from datetime import date, time
+
+from src.models.user import db
+from src.models.admin import Event
+from src.models.forms import EventRegistration
+
+def test_registrations_for_existing_events_copy_the_stored_event(app):
+    with app.app_context():
+        db.session.add_all([
+            Event(title='Cloud Summit', date=date(2026, 3, 12), time=time(9, 30), price=2500),
+            Event(title='Backup Workshop', date=date(2026, 5, 2), time=time(14, 0), price=0)
+        ])
+        db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=[
+        'db', 'generate', '--brands', '0', '--categories', '0', '--products', '0', '--events', '0',
+        '--submissions', '0', '--event-registrations', '50', '--workers', '1', '--skip-search'
+    ])
+    assert result.exit_code == 0, result.output
+
+    with app.app_context():
+        rows = db.session.query(EventRegistration, Event).join(Event, EventRegistration.event_id == Event.id).all()
+        assert len(rows) == 50
+        for registration, event in rows:
+            assert registration.event_name == event.title
+            assert registration.event_date == event.date.isoformat()
+            assert registration.event_time == event.time.strftime('%H:%M')
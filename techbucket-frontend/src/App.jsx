@@ -12,6 +12,27 @@ import heroBackground from './assets/images/hero_background.jpg';
 // API Configuration
 const API_BASE_URL = 'https://techbucket-api.onrender.com/api';
 
+// Admin lists come one page at a time; follow the cursor to load the whole list.
+// Submission lists are bare arrays with the cursor in an X-Next-Cursor header.
+const fetchAllPages = async (path) => {
+  let items = [];
+  let cursor = null;
+  do {
+    const query = cursor ? `?limit=1000&cursor=${encodeURIComponent(cursor)}` : '?limit=1000';
+    const response = await fetch(`${API_BASE_URL}${path}${query}`, { credentials: 'include' });
+    const data = await response.json();
+    if (Array.isArray(data)) {
+      items = items.concat(data);
+      cursor = response.headers.get('X-Next-Cursor');
+    } else {
+      if (!data.success) return data;
+      items = items.concat(data.data);
+      cursor = data.next_cursor;
+    }
+  } while (cursor);
+  return { success: true, data: items };
+};
+
 function App() {
   return (
     <Router>
@@ -3398,16 +3419,10 @@ function AdminProducts() {
 
   const fetchData = async () => {
     try {
-      const [productsRes, brandsRes, categoriesRes] = await Promise.all([
-        fetch(`${API_BASE_URL}/admin/products`, { credentials: 'include' }),
-        fetch(`${API_BASE_URL}/admin/brands`, { credentials: 'include' }),
-        fetch(`${API_BASE_URL}/admin/categories`, { credentials: 'include' })
-      ]);
-
       const [productsData, brandsData, categoriesData] = await Promise.all([
-        productsRes.json(),
-        brandsRes.json(),
-        categoriesRes.json()
+        fetchAllPages('/admin/products'),
+        fetchAllPages('/admin/brands'),
+        fetchAllPages('/admin/categories')
       ]);
 
       if (productsData.success) setProducts(productsData.data);
@@ -3746,8 +3761,7 @@ function AdminBrands() {
 
   const fetchBrands = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/brands`, { credentials: 'include' });
-      const data = await response.json();
+      const data = await fetchAllPages('/admin/brands');
       
       if (data.success) {
         setBrands(data.data);
@@ -3984,8 +3998,7 @@ function AdminCategories() {
 
   const fetchCategories = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/categories`, { credentials: 'include' });
-      const data = await response.json();
+      const data = await fetchAllPages('/admin/categories');
       
       if (data.success) {
         setCategories(data.data);
@@ -4214,8 +4227,7 @@ function AdminServices() {
 
   const fetchServices = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/services`, { credentials: 'include' });
-      const data = await response.json();
+      const data = await fetchAllPages('/admin/services');
       
       if (data.success) {
         setServices(data.data);
@@ -4592,8 +4604,7 @@ function AdminEvents() {
 
   const fetchEvents = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/events`, { credentials: 'include' });
-      const data = await response.json();
+      const data = await fetchAllPages('/admin/events');
       
       if (data.success) {
         setEvents(data.data);
@@ -5367,8 +5378,7 @@ function AdminInquiries() {
 
   const fetchInquiries = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/admin/inquiries`, { credentials: 'include' });
-      const data = await response.json();
+      const data = await fetchAllPages('/admin/inquiries');
       
       if (data.success) {
         setInquiries(data.data);